@@ -0,0 +1,85 @@
+import argparse
+import datetime as dt
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import scripts.codec as codec
+
+
+def generate_habit(
+        years: float,
+        seed: int = 0,
+        gap_rate: float = 0.02,
+        end: dt.date = dt.date(2024, 12, 31),
+        ) -> pd.DataFrame:
+    """Generate daily habit data in the same string form as a CSV file
+    created with the site, ending on the given date.
+    Durations drift slowly over time with weekly and random variation,
+    with some zero days and gaps of one to two weeks where nothing was
+    recorded, leaving out roughly gap_rate of all days.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = int(round(years * 365))
+    days = np.arange(codec.date_to_day(end) - n_days + 1,
+                     codec.date_to_day(end) + 1)
+
+    # Slow trend, weekly rhythm, and noise, in minutes
+    trend = 120 + 60 * np.sin(np.linspace(0, years * np.pi, n_days))
+    weekly = np.where((days + 3) % 7 >= 5, 45, 0)
+    minutes = trend + weekly + rng.normal(0, 40, n_days)
+    minutes[rng.random(n_days) < 0.05] = 0
+    seconds = (np.clip(minutes, 0, 23 * 60 + 59).astype(int) * 60)
+
+    # Drop runs of days to leave gaps in the record
+    keep = np.ones(n_days, dtype=bool)
+    for start in np.flatnonzero(rng.random(n_days) < gap_rate / 10):
+        keep[start:start + rng.integers(7, 15)] = False
+    keep[[0, -1]] = True
+
+    return pd.DataFrame({
+        'date': codec.format_dates(days[keep]),
+        'duration': codec.format_durations(seconds[keep]),
+        })
+
+def generate_habits(
+        n_habits: int,
+        years: float,
+        seed: int = 0,
+        ) -> pd.DataFrame:
+    """Generate several habits over the same years, combined into one
+    DataFrame with a 'habit' column.
+    """
+    return pd.concat(
+        [generate_habit(years, seed + i).assign(habit=f'habit_{i + 1}')
+         for i in range(n_habits)],
+        ignore_index=True,
+        )[['habit', 'date', 'duration']]
+
+def main(argv: list[str] | None = None) -> None:
+    """Write generated habit data to CSV files."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.generate',
+        description='Generate seeded synthetic habit data.',
+        )
+    parser.add_argument('output_dir', type=Path)
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--habits', type=int, default=1,
+                        help='number of habits per file (adds a habit column)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for years in args.years:
+        if args.habits > 1:
+            df = generate_habits(args.habits, years, args.seed)
+            name = f'{years:g}-year_{args.habits}-habit_data.csv'
+        else:
+            df = generate_habit(years, args.seed)
+            name = f'{years:g}-year_data.csv'
+        df.to_csv(args.output_dir / name, index=False)
+        print(f'Wrote {len(df)} rows to {args.output_dir / name}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import re
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+
+# What each screen of the site has to import before it can be shown
+scenarios = {
+    'welcome': 'import main',
+    'modes': 'import main, scripts.menu_options',
+    'upload': 'import main, scripts.menu_options, scripts.ingest',
+    'graph': 'import main, scripts.menu_options, scripts.charts',
+}
+
+_line = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def import_times(code: str) -> dict[str, int]:
+    """Run code in a fresh interpreter with -X importtime and return the
+    cumulative import time of each top-level module, in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parents[1],
+        )
+    times = {}
+    for match in _line.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        # Nested imports are indented by two spaces per level and are
+        # already included in their parent's cumulative time
+        if len(indent) == 1:
+            times[name] = int(cumulative)
+    return times
+
+def report(code: str, repeat: int, top: int) -> dict:
+    """Measure a scenario several times, keeping the fastest run to
+    reduce noise, and list the modules that took the longest.
+    """
+    runs = [import_times(code) for _ in range(repeat)]
+    best = min(runs, key=lambda times: sum(times.values()))
+    slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'code': code,
+        'total_ms': sum(best.values()) / 1000,
+        'top_modules_ms': {name: us / 1000 for name, us in slowest[:top]},
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    """Report how long each screen of the site takes to import, to keep
+    track of cold start time.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.import_time',
+        description='Measure the import time of each screen of the site.',
+        )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5,
+                        help='number of slowest modules to list')
+    parser.add_argument('--output', type=Path,
+                        help='also save the report as JSON')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, code in scenarios.items():
+        results[name] = report(code, args.repeat, args.top)
+        print(f"{name:>8} {results[name]['total_ms']:>8.0f} ms  "
+              + ', '.join(f'{module} {ms:.0f}'
+                          for module, ms
+                          in results[name]['top_modules_ms'].items()))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote {len(results)} results to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import sys
+import json
+import time
+import resource
+import argparse
+import tempfile
+import threading
+import datetime as dt
+from pathlib import Path
+from typing import Callable, Iterator
+from unittest.mock import MagicMock
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import (
+    MemoryCacheStorageManager)
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest, app_test
+from streamlit.testing.v1.util import patch_config_options
+
+from benchmarks.generate import generate_habit
+from config import Backfill
+
+
+app_path = str(Path(__file__).parent / 'load_app.py')
+
+# Positions of the options of the radio buttons at the top of main.py
+languages = {'en-US': 0, 'ja': 1}
+modes = {'welcome': 0, 'new': 1, 'track': 2, 'preview': 3}
+
+class Session:
+    """One scripted user of the site, timing every rerun it causes."""
+
+    def __init__(self, lang: str, upload: Path | None = None) -> None:
+        self.at = AppTest.from_file(app_path, default_timeout=120)
+        if upload is not None:
+            self.at.query_params['upload'] = str(upload)
+        self.lang = lang
+        self.latencies = []
+
+    def run(self, action: Callable[[], AppTest]) -> None:
+        """Perform an action that reruns the script and time it."""
+        start = time.perf_counter()
+        action()
+        self.latencies.append(time.perf_counter() - start)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+
+    def open(self, mode: str) -> None:
+        """Load the site and switch to the language and mode."""
+        self.run(self.at.run)
+        if self.lang != 'en-US':
+            self.run(self.at.radio[0].set_value(
+                self.at.radio[0].options[languages[self.lang]]).run)
+        self.run(self.at.radio[1].set_value(
+            self.at.radio[1].options[modes[mode]]).run)
+
+    def press(self, index: int = 0) -> None:
+        self.run(self.at.button[index].click().run)
+
+@contextmanager
+def shared_runtime() -> Iterator[None]:
+    """Let AppTest sessions run in parallel threads, like the sessions of
+    one server.
+
+    Each AppTest run installs its own mock of the global Streamlit
+    runtime and removes it when it finishes, which breaks any other run
+    still in progress. Instead, install one mock for the whole load test
+    (shared by every session, as the real runtime is) and give AppTest a
+    stand-in to set and clear.
+    """
+    class RuntimeStandIn:
+        _instance = None
+
+    mock_runtime = MagicMock(spec=Runtime)
+    mock_runtime.media_file_mgr = MediaFileManager(
+        MemoryMediaFileStorage('/mock/media'))
+    mock_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    saved = Runtime._instance, app_test.Runtime, app_test.patch_config_options
+    Runtime._instance = mock_runtime
+    app_test.Runtime = RuntimeStandIn
+    # AppTest also sets and restores a config option around each run
+    app_test.patch_config_options = lambda options: nullcontext()
+    try:
+        with patch_config_options({'global.appTest': True}):
+            yield
+    finally:
+        (Runtime._instance, app_test.Runtime,
+         app_test.patch_config_options) = saved
+
+def new_habit(session: Session) -> None:
+    """Start a new habit, record today, and calculate the goal."""
+    session.open('new')
+    session.press()
+    session.run(session.at.number_input[0].set_value(2).run)
+    session.press(-1)
+    session.press(-1)
+
+def track_habit(session: Session) -> None:
+    """Upload a file, fill in any missing days, calculate the goal, and
+    rename the download.
+    """
+    session.open('track')
+    # Record the missing days one at a time, or all at once in the grid, 
+    # while the site asks for them
+    for _ in range(Backfill.bulk_min_days):
+        if not any(m.value.startswith('#####') for m in session.at.markdown):
+            break
+        session.press(0)
+    session.press(-1)
+    session.run(session.at.text_input[0].set_value('load_test').run)
+
+def data_preview(session: Session) -> None:
+    """Look at every set of test data."""
+    session.open('preview')
+    for option in session.at.selectbox[0].options[1:]:
+        session.run(session.at.selectbox[0].set_value(option).run)
+
+def welcome(session: Session) -> None:
+    session.run(session.at.run)
+
+def peak_rss_bytes() -> int:
+    """Peak resident memory of this process so far, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def percentiles(latencies: list[float]) -> dict:
+    """Summarize rerun latencies in milliseconds."""
+    ms = np.array(latencies) * 1000
+    return {
+        'reruns': len(ms),
+        'mean_ms': float(ms.mean()),
+        **{f'p{p}_ms': float(np.percentile(ms, p)) for p in (50, 90, 99)},
+        'max_ms': float(ms.max()),
+    }
+
+def write_uploads(directory: Path, years: list[float]) -> list[Path]:
+    """Write up-to-date files and files a few days behind of each size
+    to upload in track mode.
+    """
+    today = dt.date.today()
+    paths = []
+    for y in years:
+        for behind in (0, 3):
+            path = directory / f'{y:g}-year_behind{behind}.csv'
+            df = generate_habit(y, end=today - dt.timedelta(days=behind))
+            df.to_csv(path, index=False)
+            paths.append(path)
+    return paths
+
+def scenarios(uploads: list[Path], langs: list[str]) -> list[tuple]:
+    """Return the mix of sessions to cycle through, as (name, function,
+    language, upload) tuples.
+    """
+    mix = [('welcome', welcome, 'en-US', None)]
+    for lang in langs:
+        mix += [(f'new_{lang}', new_habit, lang, None),
+                (f'preview_{lang}', data_preview, lang, None)]
+        mix += [(f'track_{path.stem}_{lang}', track_habit, lang, path)
+                for path in uploads]
+    return mix
+
+def main(argv: list[str] | None = None) -> None:
+    """Run many scripted sessions through every mode at once and report
+    rerun latencies, throughput, and peak memory.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.load',
+        description='Load test the site with concurrent AppTest sessions.',
+        )
+    parser.add_argument('--sessions', type=int, default=40,
+                        help='total number of sessions to run')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='number of sessions running at the same time')
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 10],
+                        help='sizes of the uploaded files')
+    parser.add_argument('--langs', nargs='+', default=list(languages),
+                        choices=list(languages))
+    parser.add_argument('--output', type=Path,
+                        help='also save the results as JSON')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mix = scenarios(write_uploads(Path(tmp), args.years), args.langs)
+        plan = [mix[i % len(mix)] for i in range(args.sessions)]
+        latencies = {name: [] for name, *_ in mix}
+        errors = []
+        lock = threading.Lock()
+
+        def run_session(name, scenario, lang, upload) -> None:
+            session = Session(lang, upload)
+            try:
+                scenario(session)
+            except Exception as e:
+                with lock:
+                    errors.append(f'{name}: {e!r}')
+            with lock:
+                latencies[name] += session.latencies
+
+        start = time.perf_counter()
+        with shared_runtime(), \
+                ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda task: run_session(*task), plan))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [s for name in latencies for s in latencies[name]]
+    results = {
+        'created': dt.datetime.now().isoformat(timespec='seconds'),
+        'sessions': args.sessions,
+        'concurrency': args.concurrency,
+        'elapsed_s': elapsed,
+        'sessions_per_s': args.sessions / elapsed,
+        'reruns_per_s': len(all_latencies) / elapsed,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'overall': percentiles(all_latencies),
+        'scenarios': {name: percentiles(values)
+                      for name, values in latencies.items() if values},
+        'errors': errors,
+    }
+
+    print(f"{args.sessions} sessions, {args.concurrency} at a time, "
+          f"in {elapsed:.1f} s: {results['sessions_per_s']:.2f} sessions/s, "
+          f"{results['reruns_per_s']:.1f} reruns/s, "
+          f"peak RSS {results['peak_rss_bytes'] / 2**20:.0f} MiB")
+    for name, summary in [('overall', results['overall']),
+                          *results['scenarios'].items()]:
+        print(f"{name:>28} {summary['reruns']:>5} reruns  "
+              f"p50 {summary['p50_ms']:>7.1f}  p90 {summary['p90_ms']:>7.1f}  "
+              f"p99 {summary['p99_ms']:>7.1f} ms")
+    for error in errors:
+        print('error:', error)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote the results to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import io
+import sys
+from pathlib import Path
+
+import streamlit as st
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+import main
+
+
+# AppTest can't upload files, so sessions of the load test pass the path
+# of the file to "upload" as a query parameter instead. The uploader is
+# replaced once per process and looks up the path for each session.
+if not hasattr(st.file_uploader, 'load_test'):
+    real_file_uploader = st.file_uploader
+
+    def file_uploader(*args, **kwargs):
+        path = st.query_params.get('upload')
+        if path is None:
+            return real_file_uploader(*args, **kwargs)
+        file = io.BytesIO(Path(path).read_bytes())
+        file.name = Path(path).name
+        return [file] if kwargs.get('accept_multiple_files') else file
+
+    file_uploader.load_test = True
+    st.file_uploader = file_uploader
+
+main.main()
@@ -0,0 +1,133 @@
+import io
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import tracemalloc
+import datetime as dt
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+import scripts.codec as codec
+import scripts.engine as engine
+from scripts.ingest import read_habit_csv
+from scripts.localize import localize_df_data
+from scripts.charts import render_graph, render_heatmap
+from scripts.altair_charts import build_graph
+from benchmarks.generate import generate_habit
+from config import Lang, Chart
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict:
+    """Time a function over several runs and measure the peak memory
+    it allocates in one extra run.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    # Memory is traced separately since tracing slows everything down
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'repeat': repeat,
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_bytes': peak,
+    }
+
+def stages(raw_df: pd.DataFrame, csv_bytes: bytes) -> dict:
+    """Return the hot paths of the site to measure, as functions of no
+    arguments working on the same data.
+    """
+    compact_df = codec.encode_frame(raw_df)
+    rollups = engine.chart_rollups(compact_df, Chart.max_points)
+
+    def localize(lang):
+        def run():
+            Lang.lang = lang
+            localize_df_data(compact_df, lang)
+        return run
+
+    return {
+        'csv_ingest': lambda: read_habit_csv(io.BytesIO(csv_bytes)),
+        'pandas_read_csv': lambda: pd.read_csv(io.BytesIO(csv_bytes)),
+        'pd_to_timedelta': lambda: pd.to_timedelta(raw_df['duration']),
+        'codec_parse_durations':
+            lambda: codec.parse_durations(raw_df['duration']),
+        'codec_format_durations':
+            lambda: codec.format_durations(compact_df['duration']),
+        'localize_en': localize('en-US'),
+        'localize_ja': localize('ja'),
+        'averages': lambda: engine.calculate_averages(compact_df),
+        'stats': lambda: engine.habit_statistics(compact_df),
+        'resample': lambda: engine.resample_durations(compact_df),
+        'render_en': lambda: render_graph(compact_df, 'en-US'),
+        'render_ja': lambda: render_graph(compact_df, 'ja'),
+        'rollups': lambda: engine.chart_rollups(compact_df, Chart.max_points),
+        'vega_spec': lambda: build_graph(rollups['rollups'], rollups['unit'],
+                                         'ja').to_dict(),
+        'heatmap': lambda: render_heatmap(
+            compact_df, codec.day_to_date(compact_df['date'].iloc[-1]).year),
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    """Run every stage on generated data of each size and save the
+    results as JSON so they can be compared between versions.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Time the hot paths of the site on synthetic data.',
+        )
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', metavar='STAGE',
+                        help='only run the stages with these names')
+    parser.add_argument('--output', type=Path,
+                        default=Path('bench_results.json'))
+    args = parser.parse_args(argv)
+
+    results = []
+    for years in args.years:
+        raw_df = generate_habit(years, args.seed)
+        csv_bytes = raw_df.to_csv(index=False).encode()
+        for name, fn in stages(raw_df, csv_bytes).items():
+            if args.only and name not in args.only:
+                continue
+            result = {'stage': name, 'years': years, 'rows': len(raw_df),
+                      **measure(fn, args.repeat)}
+            results.append(result)
+            print(f"{name:>24} {years:>5g} yr {len(raw_df):>6} rows "
+                  f"{result['median_s'] * 1000:>9.2f} ms "
+                  f"{result['peak_bytes'] / 1024:>9.0f} KiB")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created': dt.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'seed': args.seed,
+            'results': results,
+        }, f, indent=2)
+    print(f'Wrote {len(results)} results to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import io
+import gc
+import json
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from scripts.aggregates import RunningAggregates
+from scripts.ingest import read_habit_csv
+from scripts.milestones import MilestoneIndex
+from scripts.series import HabitSeries
+from benchmarks.generate import generate_habit
+
+
+def session_state(csv_bytes: bytes) -> dict:
+    """Build what a session keeps after uploading a file: the habit
+    series, its running totals, and its milestone index.
+    """
+    df, _ = read_habit_csv(io.BytesIO(csv_bytes))
+    series = HabitSeries(df['date'], df['duration'])
+    return {'habit_series': series,
+            'update_data_aggregates':
+                RunningAggregates.from_seconds(series.seconds),
+            'update_data_milestones':
+                MilestoneIndex(series.days, series.seconds)}
+
+def retained_bytes(csv_bytes: bytes, sessions: int) -> dict:
+    """Measure the memory still held once the state of several sessions
+    has been built, along with the peak while building it.
+    Also checks that the frames handed to the rest of the site are views
+    of the series rather than copies.
+    """
+    gc.collect()
+    tracemalloc.start()
+    states = [session_state(csv_bytes) for _ in range(sessions)]
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+
+    # Taking a frame of the data shouldn't allocate another copy of it
+    series = states[0]['habit_series']
+    before, _ = tracemalloc.get_traced_memory()
+    frame = series.frame()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'sessions': sessions,
+        'per_session_bytes': current // sessions,
+        'series_nbytes': series.nbytes,
+        'peak_bytes': peak,
+        'frame_bytes': after - before,
+        'frame_is_view': bool(
+            np.shares_memory(frame['date'].to_numpy(), series.days)
+            and np.shares_memory(frame['duration'].to_numpy(), series.seconds)
+            ),
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    """Report the memory each session uses for data of each size."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.session_memory',
+        description='Measure the memory kept per session with tracemalloc.',
+        )
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path,
+                        help='also save the results as JSON')
+    args = parser.parse_args(argv)
+
+    results = []
+    for years in args.years:
+        raw_df = generate_habit(years, args.seed)
+        csv_bytes = raw_df.to_csv(index=False).encode()
+        result = {'years': years, 'rows': len(raw_df),
+                  **retained_bytes(csv_bytes, args.sessions)}
+        results.append(result)
+        print(f"{years:>5g} yr {len(raw_df):>6} rows "
+              f"{result['per_session_bytes'] / 1024:>8.1f} KiB/session "
+              f"(arrays {result['series_nbytes'] / 1024:.1f} KiB, "
+              f"frame view {result['frame_bytes'] / 1024:.1f} KiB)")
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Wrote {len(results)} results to {args.output}')
+
+if __name__ == '__main__':
+    main()
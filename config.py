@@ -1,2 +1,104 @@
-class Lang:
-    lang = 'en-US'
+import os
+from pathlib import Path
+
+
+class _SessionLang(type):
+    # Every session on the server shares this module, so the selected
+    # language is kept in each session's state rather than on the class.
+    # Outside of a Streamlit session (scripts and benchmarks) it falls
+    # back to the class default.
+    @property
+    def lang(cls) -> str:
+        state = _session_state()
+        if state is None or 'lang' not in state:
+            return cls.default
+        return state['lang']
+
+    @lang.setter
+    def lang(cls, value: str) -> None:
+        state = _session_state()
+        if state is None:
+            cls.default = value
+        else:
+            state['lang'] = value
+
+def _session_state():
+    """Return the state of the session running this thread, or None."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return None if ctx is None else ctx.session_state
+
+class Lang(metaclass=_SessionLang):
+    default = 'en-US'
+
+class Cache:
+    # Upper bound on the memory used by cached insights, in bytes
+    max_bytes = 64 * 1024 * 1024
+
+class Chart:
+    # Daily data beyond this many points is downsampled before plotting
+    max_points = 1500
+    # Font needed to display Japanese in graphs
+    ja_font = Path(__file__).parent / 'fonts' / 'NotoSansJP-Regular.ttf'
+    # How graphs are drawn, set with the ICHIMAN_CHARTS environment 
+    # variable: 'matplotlib' renders images on the server, and 'altair' 
+    # sends pre-aggregated data to be drawn interactively in the browser
+    backend = os.environ.get('ICHIMAN_CHARTS', 'matplotlib')
+
+class Insights:
+    # Windows of recorded days to find the latest and best rolling 
+    # averages of, besides the last 7 and 30 day averages
+    windows = (7, 30, 90, 365)
+    # Percentiles of the daily durations to show
+    percentiles = (25, 50, 75)
+
+class Goal:
+    # Numbers of hours to show when each was or will be reached
+    milestones = (100, 1000, 5000, 10000)
+    # Windows of recent recorded days whose pace the goal is also 
+    # forecast from, besides the overall average
+    forecast_windows = (7, 30, 90)
+
+class Ingest:
+    # Size of each chunk read from an uploaded CSV file, in bytes
+    chunk_bytes = 1024 * 1024
+    # Maximum number of unreadable line numbers to show the user
+    max_bad_lines_shown = 10
+    # Number of uploaded files read at the same time
+    max_workers = 4
+    # How days recorded in more than one uploaded file are combined: 
+    # 'latest' keeps the one from the file with the most recent data, 
+    # 'max' keeps the longest, and 'sum' adds their durations (up to 24 
+    # hours). Overlapping downloads of the same habit repeat the same 
+    # days, so they shouldn't be added together by default.
+    duplicate_policy = 'latest'
+
+class Backfill:
+    # Gaps of at least this many days are entered all at once in a grid
+    bulk_min_days = 7
+
+class Table:
+    # Longer tables of the data are shown one page of this many rows at 
+    # a time
+    page_rows = 365
+
+class Store:
+    # SQLite file to keep habits in on the server, set with the 
+    # ICHIMAN_STORE environment variable. Without it, data is only kept 
+    # in the files users download.
+    path = os.environ.get('ICHIMAN_STORE')
+    # Maximum number of idle connections kept open per process
+    pool_size = 4
+
+class Metrics:
+    # File to export the time spent in each stage of a rerun to, in the 
+    # Prometheus text format, set with the ICHIMAN_METRICS environment 
+    # variable. Stages aren't timed at all without it.
+    path = os.environ.get('ICHIMAN_METRICS')
+    # Also measure the memory each stage allocates, which slows down 
+    # everything while enabled. Allocations are traced for the whole 
+    # process, so they're only exact while one session is running.
+    trace_allocations = os.environ.get('ICHIMAN_METRICS_ALLOCATIONS') == '1'
+    # Minimum number of seconds between rewrites of the file with the 
+    # latest totals
+    export_interval = 10
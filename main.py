@@ -1,6 +1,6 @@
 import streamlit as st
 
-import scripts.menu_options as modes
+import scripts.metrics as metrics
 from scripts.i18n import get_translation as gt
 from config import Lang
 
@@ -11,6 +11,7 @@ def main():
         page_icon='⏱️',
         layout='wide',
         )
+    metrics.start_run()
 
     c1, c2, c3 = st.columns([2, 1, 1])
     with c1:
@@ -26,6 +27,9 @@ def main():
         else:
             Lang.lang = 'en-US'
     with c3:
+        # The goal of the last download is only compared against the
+        # goal entered on the page that shows that download, so it's
+        # forgotten whenever another mode is selected
         mode = st.radio(
             gt('main.select', Lang.lang),
             (gt('main.welcome', Lang.lang),
@@ -33,6 +37,7 @@ def main():
             gt('main.track', Lang.lang),
             gt('main.preview', Lang.lang),
             ),
+            on_change=lambda: st.session_state.pop('download_goal', None),
         )
 
     st.divider()
@@ -41,17 +46,28 @@ def main():
         st.write(gt('main.welcome_try', Lang.lang))
         st.write(gt('main.github', Lang.lang))
 
-    elif mode == gt('main.new', Lang.lang):
-        modes.new_habit()
-    
-    elif mode == gt('main.track', Lang.lang):
-        modes.track_habit()
+    else:
+        # The modes need pandas and the rest of the data stack, so they 
+        # are only imported once one is selected. The welcome page loads 
+        # with just Streamlit.
+        import scripts.menu_options as modes
 
-    elif mode == gt('main.preview', Lang.lang):
-        modes.data_preview()
+        if mode == gt('main.new', Lang.lang):
+            modes.new_habit()
+        
+        elif mode == gt('main.track', Lang.lang):
+            modes.track_habit()
+
+        elif mode == gt('main.preview', Lang.lang):
+            modes.data_preview()
 
     st.divider()
     st.caption('© 2024. All rights reserved.')
 
+    # Hidden panel of the time spent in each stage of this rerun
+    if metrics.enabled() and st.query_params.get('debug') == '1':
+        from scripts.debug import debug_panel
+        debug_panel()
+
 if __name__ == "__main__":
     main()
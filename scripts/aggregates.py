@@ -0,0 +1,79 @@
+from collections import deque
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class RunningAggregates:
+    """Running totals of daily durations (in whole seconds) that can be
+    updated in constant time as each new day is recorded.
+    Keeps the overall total and count as well as ring buffers of the
+    last 7 and 30 recorded days.
+    """
+    windows = (7, 30)
+
+    def __init__(self, seconds: Iterable[int] = ()) -> None:
+        self.count = 0
+        self.total = 0
+        self._recent = {days: deque(maxlen=days) for days in self.windows}
+        self._recent_totals = {days: 0 for days in self.windows}
+        for s in seconds:
+            self.append(s)
+
+    @classmethod
+    def from_seconds(cls, seconds) -> 'RunningAggregates':
+        """Build the aggregates from an array of durations in seconds. 
+        Only the longest window's worth of days is fed through append; 
+        the rest is summed in one vectorized pass.
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        longest = max(cls.windows)
+        agg = cls(seconds[-longest:].tolist())
+        older = seconds[:-longest]
+        agg.count += len(older)
+        agg.total += int(older.sum())
+        return agg
+
+    @classmethod
+    def from_totals(cls, count: int, total: int,
+                    recent_seconds) -> 'RunningAggregates':
+        """Build the aggregates from an overall count and total that were 
+        already summed elsewhere (such as in the database) and the 
+        durations of the most recent days in order, at least as many as 
+        the longest window when available.
+        """
+        recent_seconds = [int(s) for s in recent_seconds]
+        agg = cls(recent_seconds)
+        agg.count = count
+        agg.total = total
+        return agg
+
+    def append(self, seconds: int) -> None:
+        """Record the duration of one more day."""
+        self.count += 1
+        self.total += seconds
+        for days, recent in self._recent.items():
+            if len(recent) == days:
+                self._recent_totals[days] -= recent[0]
+            recent.append(seconds)
+            self._recent_totals[days] += seconds
+
+    def window_mean(self, days: int) -> pd.Timedelta:
+        """Average duration of the last `days` recorded days."""
+        recent = self._recent[days]
+        return pd.Timedelta(seconds=self._recent_totals[days] / len(recent))
+
+    def averages(self) -> dict:
+        """Return the totals and averages in the form used by
+        daily_averages and goal_progress. Averages that there isn't
+        enough data for are None.
+        """
+        return {
+            'count': self.count,
+            'total': pd.Timedelta(seconds=self.total),
+            'overall': (pd.Timedelta(seconds=self.total / self.count)
+                        if self.count >= 2 else None),
+            'last7': self.window_mean(7) if self.count > 7 else None,
+            'last30': self.window_mean(30) if self.count > 30 else None,
+        }
@@ -0,0 +1,66 @@
+import json
+
+import altair as alt
+import pandas as pd
+
+from scripts.i18n import get_translation as gt
+from scripts.i18n import concise_date_formats, vega_time_format
+
+
+# Altair is only imported the first time an interactive graph is built,
+# and only if the site is configured to use them
+
+# Colors of each level of the graph, the same as in the static graph
+level_colors = {
+    'daily': 'gray',
+    'weekly': 'blue',
+    'monthly': 'red',
+    'yearly': 'green',
+}
+
+def build_graph(rollups: pd.DataFrame, unit: str, lang: str = 'en-US'
+                ) -> alt.LayerChart:
+    """Build an interactive graph of data pre-aggregated by
+    engine.chart_rollups: the daily durations as points and the weekly,
+    monthly, and yearly means as lines. It's drawn in the browser,
+    where it can be zoomed and panned along the dates.
+    """
+    levels = [level for level in level_colors
+              if level in set(rollups['level'])]
+    labels = {level: gt(f'graph.{level}', lang) for level in levels}
+    full_date = concise_date_formats.get(
+        lang, concise_date_formats['en-US'])['offset_formats'][3]
+
+    # Dates are midnight UTC, so they're formatted in UTC rather than
+    # the browser's time zone to stay on the right day
+    base = alt.Chart(rollups).encode(
+        x=alt.X('date:T', title=gt('graph.dates', lang),
+                scale=alt.Scale(type='utc'),
+                axis=alt.Axis(format=vega_time_format(lang),
+                              formatType='utc')),
+        y=alt.Y('duration:Q', title=gt(f'misc.{unit}', lang)),
+        color=alt.Color(
+            'level:N', title=None,
+            scale=alt.Scale(domain=levels,
+                            range=[level_colors[level] for level in levels]),
+            legend=alt.Legend(
+                orient='top-left',
+                labelExpr=f'{json.dumps(labels, ensure_ascii=False)}'
+                          '[datum.label]'),
+            ),
+        tooltip=[
+            alt.Tooltip('date:T', title=gt('misc.date', lang),
+                        format=full_date, formatType='utc'),
+            alt.Tooltip('duration:Q', title=gt(f'misc.{unit}', lang),
+                        format='.2f'),
+            ],
+        )
+    daily = (base.transform_filter(alt.datum.level == 'daily')
+             .mark_point(filled=True, size=12))
+    averages = (base.transform_filter(alt.datum.level != 'daily')
+                .mark_line(point=True))
+
+    # Zooming and panning only change the dates shown
+    zoom = alt.selection_interval(bind='scales', encodings=['x'])
+    return (alt.layer(daily.add_params(zoom), averages)
+            .properties(title=gt('graph.title', lang), height=450))
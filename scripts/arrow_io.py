@@ -0,0 +1,141 @@
+import io
+import json
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.types as pa_types
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+
+import scripts.codec as codec
+
+
+# Key of the habit name and goal in the file's schema metadata
+_metadata_key = b'ichiman'
+
+def to_table(df: pd.DataFrame, metadata: dict | None = None) -> pa.Table:
+    """Convert a compact DataFrame to an Arrow table with typed date32
+    and duration[s] columns, storing the metadata (habit name and goal, 
+    or file name and goals) in the schema. The names of several habits 
+    are stored as a dictionary-encoded 'habit' column.
+    """
+    columns = {}
+    if 'habit' in df.columns:
+        columns['habit'] = pa.DictionaryArray.from_arrays(
+            pa.array(df['habit'].cat.codes.to_numpy(), pa.int32()),
+            pa.array(df['habit'].cat.categories.astype(str), pa.string()))
+    columns['date'] = (pa.array(df['date'].to_numpy(), pa.int32())
+                       .cast(pa.date32()))
+    columns['duration'] = (pa.array(df['duration'].to_numpy(), pa.int64())
+                           .cast(pa.duration('s')))
+    table = pa.table(columns)
+    if metadata:
+        table = table.replace_schema_metadata(
+            {_metadata_key: json.dumps(metadata)})
+    return table
+
+def _valid_numpy(column: pa.Array) -> tuple[np.ndarray, np.ndarray]:
+    """View an integer column as a NumPy array without copying it, along 
+    with a mask of which values aren't null. Nulls are read as 0.
+    """
+    if column.null_count == 0:
+        return (column.to_numpy(zero_copy_only=True),
+                np.ones(len(column), dtype=bool))
+    return (column.fill_null(0).to_numpy(zero_copy_only=True),
+            column.is_valid().to_numpy(zero_copy_only=False))
+
+def from_table(table: pa.Table) -> tuple[pd.DataFrame, list[int], dict]:
+    """Convert an Arrow table to a compact DataFrame sorted by date
+    with duplicate dates merged, along with its metadata. A table with 
+    a 'habit' column is converted to a compact DataFrame of several 
+    habits, sorted by habit and then date.
+    Rows with a missing or invalid date, duration, or habit are skipped 
+    the same way as in CSV files, and their row numbers (starting at 1) 
+    are returned between the two.
+    Columns written by this site are viewed without copying. Other
+    types are converted where possible.
+    """
+    try:
+        date_col = table.column('date').combine_chunks()
+        duration_col = table.column('duration').combine_chunks()
+    except KeyError as e:
+        raise ValueError(str(e)) from e
+
+    if pa_types.is_string(date_col.type) or pa_types.is_large_string(
+            date_col.type):
+        days, days_valid = codec.try_parse_dates(
+            date_col.to_numpy(zero_copy_only=False))
+    else:
+        days, days_valid = _valid_numpy(
+            date_col.cast(pa.date32()).cast(pa.int32()))
+    if pa_types.is_duration(duration_col.type):
+        seconds, seconds_valid = _valid_numpy(
+            duration_col.cast(pa.duration('s'), safe=False).cast(pa.int64()))
+    elif pa_types.is_integer(duration_col.type):
+        seconds, seconds_valid = _valid_numpy(duration_col)
+    else:
+        seconds, seconds_valid = codec.try_parse_durations(
+            duration_col.to_numpy(zero_copy_only=False))
+
+    # A day can't have a negative duration or more than 24 hours, which 
+    # is checked before narrowing the durations to int32
+    valid = (days_valid & seconds_valid
+             & (seconds >= 0) & (seconds <= codec.max_seconds))
+    if 'habit' in table.column_names:
+        # Chunks may each have their own dictionary, so the names are 
+        # encoded again as a whole
+        habit_col = (table.column('habit').cast(pa.string())
+                     .combine_chunks().dictionary_encode())
+        codes, codes_valid = _valid_numpy(habit_col.indices)
+        named = np.array([bool(name) for name in
+                          habit_col.dictionary.to_pylist()] + [False])
+        valid &= codes_valid & named[np.where(codes_valid, codes, -1)]
+    bad_rows = (np.flatnonzero(~valid) + 1).tolist()
+    if not valid.all():
+        days, seconds = days[valid], seconds[valid]
+    seconds = np.asarray(seconds, dtype=np.int32)
+
+    if 'habit' in table.column_names:
+        codes, days, seconds = codec.merge_habit_dates(
+            codes[valid], days, seconds)
+        df = codec.make_habit_frame(habit_col.dictionary.to_pylist(),
+                                    codes, days, seconds)
+    else:
+        df = codec.merge_dates(days, seconds)
+
+    metadata = {}
+    if table.schema.metadata and _metadata_key in table.schema.metadata:
+        metadata = json.loads(table.schema.metadata[_metadata_key])
+    return df, bad_rows, metadata
+
+def to_parquet_bytes(df: pd.DataFrame, metadata: dict | None = None) -> bytes:
+    """Write a compact DataFrame to a zstd-compressed Parquet file."""
+    buffer = io.BytesIO()
+    pq.write_table(to_table(df, metadata), buffer, compression='zstd')
+    return buffer.getvalue()
+
+def to_feather_bytes(df: pd.DataFrame, metadata: dict | None = None) -> bytes:
+    """Write a compact DataFrame to an lz4-compressed Feather (Arrow
+    IPC) file.
+    """
+    buffer = io.BytesIO()
+    feather.write_feather(to_table(df, metadata), buffer, compression='lz4')
+    return buffer.getvalue()
+
+def _buffer_reader(file: BinaryIO) -> pa.BufferReader:
+    """Wrap an uploaded file's contents for Arrow without copying them."""
+    if hasattr(file, 'getbuffer'):
+        return pa.BufferReader(pa.py_buffer(file.getbuffer()))
+    return pa.BufferReader(file.read())
+
+def read_habit_parquet(
+        file: BinaryIO) -> tuple[pd.DataFrame, list[int], dict]:
+    """Read a Parquet file of dates and durations."""
+    return from_table(pq.read_table(_buffer_reader(file)))
+
+def read_habit_feather(
+        file: BinaryIO) -> tuple[pd.DataFrame, list[int], dict]:
+    """Read a Feather (Arrow IPC) file of dates and durations."""
+    return from_table(feather.read_table(_buffer_reader(file)))
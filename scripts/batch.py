@@ -0,0 +1,84 @@
+import os
+import json
+import argparse
+from pathlib import Path
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from scripts.engine import habit_report
+from scripts.ingest import read_habit_file
+from scripts.series import HabitSet
+
+
+# Extensions of the habit files included in a batch
+habit_file_suffixes = ('.csv', '.parquet', '.feather')
+
+def report_file(path: Path, goal_hours: int, lang: str) -> list[dict]:
+    """Read one habit file and compute its report, or one report per 
+    habit for a file of several habits. A file that can't be read gets 
+    a report with the error instead of stopping the batch.
+    """
+    try:
+        with open(path, 'rb') as f:
+            df, bad_lines, metadata = read_habit_file(f)
+        if len(df) == 0:
+            raise ValueError('No valid rows')
+        if 'habit' in df.columns:
+            goals = metadata.get('goals', {})
+            habits = [(name, series.frame(), goals.get(name, goal_hours))
+                      for name, series in HabitSet.from_frame(df).items()]
+        else:
+            habits = [(metadata.get('habit', path.stem), df,
+                       metadata.get('goal', goal_hours))]
+        reports = [(name, habit_report(habit_df, int(goal), lang))
+                   for name, habit_df, goal in habits]
+    except (ValueError, OSError) as e:
+        return [{'file': path.name, 'error': str(e)}]
+    return [{'file': path.name, 'habit': name, 'bad_lines': bad_lines,
+             **report}
+            for name, report in reports]
+
+def write_reports(reports: list[dict], output: Path) -> None:
+    """Save the reports as a JSON list, or as a Parquet table with one
+    row per file if the output path ends in '.parquet'.
+    """
+    if output.suffix == '.parquet':
+        pd.json_normalize(reports).to_parquet(output, index=False)
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+def main(argv: list[str] | None = None) -> None:
+    """Compute the insights for every habit file in a directory in
+    parallel, without a Streamlit session.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m scripts.batch',
+        description='Compute insights for every habit file in a directory.',
+        )
+    parser.add_argument('input_dir', type=Path,
+                        help='directory of CSV, Parquet, or Feather files')
+    parser.add_argument('output', type=Path,
+                        help='report file to write (.json or .parquet)')
+    parser.add_argument('--goal', type=int, default=10000,
+                        help='goal in hours for files without a saved goal')
+    parser.add_argument('--lang', choices=('en-US', 'ja'), default='en-US',
+                        help='language of the summaries')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes')
+    args = parser.parse_args(argv)
+
+    paths = sorted(path for path in args.input_dir.iterdir()
+                   if path.suffix.lower() in habit_file_suffixes)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        reports = [report for file_reports in pool.map(
+            report_file, paths, repeat(args.goal), repeat(args.lang),
+            chunksize=max(1, len(paths) // (4 * args.workers)),
+            ) for report in file_reports]
+    write_reports(reports, args.output)
+    print(f'Wrote {len(reports)} reports to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import sys
+import threading
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+from config import Cache
+
+
+def sizeof(value: Any) -> int:
+    """Estimate the memory held by a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+# Shared by every session in the process, so guard it with a lock since
+# Streamlit runs each session's script in its own thread
+_cache = LRUCache(maxsize=Cache.max_bytes, getsizeof=sizeof)
+_lock = threading.Lock()
+
+# Values computed for pinned data are kept here instead, outside of the 
+# size bound, until the data is unpinned
+_pinned = {}
+_pinned_hashes = set()
+
+def pin(data_hash: str) -> None:
+    """Keep every value computed for the data with this hash (the 
+    second item of its keys) until it is unpinned, instead of letting 
+    it be evicted.
+    """
+    with _lock:
+        _pinned_hashes.add(data_hash)
+
+def unpin(data_hash: str) -> None:
+    """Stop keeping the values computed for the data with this hash."""
+    with _lock:
+        _pinned_hashes.discard(data_hash)
+        for key in [key for key in _pinned if key[1] == data_hash]:
+            del _pinned[key]
+
+def _store(key: tuple) -> dict:
+    """Return where the value for the key is kept. Call with the lock."""
+    if len(key) > 1 and key[1] in _pinned_hashes:
+        return _pinned
+    return _cache
+
+def get_or_compute(key: tuple, compute: Callable[[], Any]) -> Any:
+    """Return the cached value for the key, computing and storing it
+    first if it is missing. The least recently used values are evicted
+    once the cache grows past its size bound, unless the key's data is 
+    pinned.
+    """
+    with _lock:
+        value = _store(key).get(key)
+    if value is None:
+        value = compute()
+        with _lock:
+            try:
+                _store(key)[key] = value
+            except ValueError:
+                # Too large to ever fit, so just don't cache it
+                pass
+    return value
@@ -0,0 +1,133 @@
+import numpy as np
+
+
+# 1970-01-01 was a Thursday, so (day + 3) % 7 is the weekday with Monday
+# as 0 and (day + 4) % 7 is the weekday with Sunday as 0
+def weekday(days) -> np.ndarray:
+    """Weekday of int days since the epoch, with Monday as 0."""
+    return (np.asarray(days, dtype=np.int64) + 3) % 7
+
+class CalendarIndex:
+    """Durations laid out on a dense calendar: one slot per day from the
+    first recorded day to the last, indexed by the offset from the first
+    day, with a mask of which days were actually recorded.
+    Weekly, monthly, and day-of-week statistics are reductions over
+    reshaped or sliced views of these arrays, only counting recorded
+    days.
+    """
+    __slots__ = ('start', 'seconds', 'recorded')
+
+    def __init__(self, days, seconds) -> None:
+        days = np.asarray(days, dtype=np.int64)
+        self.start = int(days[0]) if len(days) else 0
+        n_days = int(days[-1]) - self.start + 1 if len(days) else 0
+        offsets = days - self.start
+        self.seconds = np.zeros(n_days, dtype=np.int64)
+        self.seconds[offsets] = seconds
+        self.recorded = np.zeros(n_days, dtype=bool)
+        self.recorded[offsets] = True
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    @property
+    def end(self) -> int:
+        """Last day, inclusive."""
+        return self.start + len(self) - 1
+
+    @property
+    def days(self) -> np.ndarray:
+        return np.arange(self.start, self.start + len(self))
+
+    @property
+    def missing_days(self) -> int:
+        """Number of days between the first and last without a record."""
+        return int(len(self) - self.recorded.sum())
+
+    def span(self, first: int, last: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the durations and recorded mask from day first to last
+        inclusive, padded with unrecorded days outside the data.
+        """
+        n_days = last - first + 1
+        seconds = np.zeros(n_days, dtype=np.int64)
+        recorded = np.zeros(n_days, dtype=bool)
+        lo, hi = max(first, self.start), min(last, self.end)
+        if lo <= hi:
+            seconds[lo - first:hi - first + 1] = (
+                self.seconds[lo - self.start:hi - self.start + 1])
+            recorded[lo - first:hi - first + 1] = (
+                self.recorded[lo - self.start:hi - self.start + 1])
+        return seconds, recorded
+
+    def _weeks(self) -> tuple[int, np.ndarray, np.ndarray]:
+        """Return the first Monday and the durations and recorded mask
+        padded to whole Monday to Sunday weeks, shaped weeks x 7.
+        """
+        first = self.start - int(weekday(self.start))
+        last = self.end + 6 - int(weekday(self.end))
+        seconds, recorded = self.span(first, last)
+        return first, seconds.reshape(-1, 7), recorded.reshape(-1, 7)
+
+    def weekly_means(self) -> tuple[np.ndarray, np.ndarray]:
+        """Mean duration in seconds of the recorded days of each week,
+        labeled by the Sunday that ends it like pandas' 'W' frequency.
+        Weeks without any recorded days are NaN.
+        """
+        first, seconds, recorded = self._weeks()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = seconds.sum(axis=1) / recorded.sum(axis=1)
+        return first + 6 + 7 * np.arange(len(means)), means
+
+    def monthly_means(self) -> tuple[np.ndarray, np.ndarray]:
+        """Mean duration in seconds of the recorded days of each month,
+        labeled by the last day of the month like pandas' 'ME' frequency.
+        Months without any recorded days are NaN.
+        """
+        months = self.days.astype('datetime64[D]').astype('datetime64[M]')
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        totals = np.add.reduceat(self.seconds, starts)
+        counts = np.add.reduceat(self.recorded.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = totals / counts
+        month_ends = ((months[starts] + 1).astype('datetime64[D]')
+                      .astype(np.int64) - 1)
+        return month_ends, means
+
+    def yearly_means(self) -> tuple[np.ndarray, np.ndarray]:
+        """Mean duration in seconds of the recorded days of each year,
+        labeled by December 31 like pandas' 'YE' frequency.
+        Years without any recorded days are NaN.
+        """
+        years = self.days.astype('datetime64[D]').astype('datetime64[Y]')
+        starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+        totals = np.add.reduceat(self.seconds, starts)
+        counts = np.add.reduceat(self.recorded.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = totals / counts
+        year_ends = ((years[starts] + 1).astype('datetime64[D]')
+                     .astype(np.int64) - 1)
+        return year_ends, means
+
+    def weekday_means(self) -> np.ndarray:
+        """Mean duration in seconds of the recorded days falling on each
+        weekday, from Monday to Sunday. NaN for weekdays never recorded.
+        """
+        _, seconds, recorded = self._weeks()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return seconds.sum(axis=0) / recorded.sum(axis=0)
+
+    def year_grid(self, year: int) -> tuple[int, np.ndarray]:
+        """Lay out the durations of one year as a 7 x weeks grid like a
+        GitHub contribution graph: one column per week from Sunday to
+        Saturday. Days outside the year or not recorded are NaN.
+        Return the first Sunday of the grid along with it.
+        """
+        jan1 = int(np.datetime64(f'{year}-01-01', 'D').astype(np.int64))
+        dec31 = int(np.datetime64(f'{year}-12-31', 'D').astype(np.int64))
+        first = jan1 - int((jan1 + 4) % 7)
+        last = dec31 + 6 - int((dec31 + 4) % 7)
+        seconds, recorded = self.span(first, last)
+        in_year = np.zeros(len(seconds), dtype=bool)
+        in_year[jan1 - first:dec31 - first + 1] = True
+        grid = np.where(recorded & in_year, seconds, np.nan)
+        return first, grid.reshape(-1, 7).T
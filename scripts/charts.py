@@ -0,0 +1,138 @@
+import io
+
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+
+from config import Chart
+import scripts.codec as codec
+import scripts.engine as engine
+import scripts.metrics as metrics
+from scripts.downsample import lttb
+from scripts.i18n import get_translation as gt
+from scripts.i18n import localize_ConciseDateFormatter
+from scripts.styles import apply_style
+
+
+# matplotlib is the slowest import of the site, so this module is only 
+# imported the first time a graph needs to be rendered. Figures are 
+# created directly rather than through pyplot, which keeps track of 
+# them globally: Streamlit closes all of pyplot's figures whenever any 
+# session's script finishes, including ones other sessions are drawing.
+
+def render_graph(
+        df: pd.DataFrame,
+        lang: str = 'en-US',
+        resampled: dict | None = None,
+        ) -> bytes:
+    """Render a graph of the data as PNG image bytes, using its 
+    resampled durations if they were already calculated.
+    Daily data - for any number of days.
+    Weekly averages - if there are at least 15 days.
+    Monthly averages - if there are at lease 62 days.
+    """
+    # Index by date and convert the durations to minutes if under 2 
+    # hours or hours otherwise, then resample the data by week and 
+    # calculate the means for each week and month
+    if resampled is None:
+        with metrics.stage('resample', rows=len(df)):
+            resampled = engine.resample_durations(df)
+    graph_df = resampled['daily'].to_frame('duration')
+    weekly_average = resampled['weekly'].to_frame('duration')
+    monthly_average = resampled['monthly'].to_frame('duration')
+    y_unit = gt(f"misc.{resampled['unit']}", lang)
+
+    # Downsample the daily points for very large data sets, keeping 
+    # their overall shape. The averages above still use all the data.
+    daily_df = graph_df
+    if len(graph_df) > Chart.max_points:
+        keep = lttb(mdates.date2num(graph_df.index),
+                    graph_df['duration'].to_numpy(), Chart.max_points)
+        daily_df = graph_df.iloc[keep]
+
+    # Set up the graph depending on the size of the data set
+    fig = Figure(figsize=(7,5), dpi=150)
+    ax = fig.subplots()
+    if len(graph_df) < 15:
+        ax.plot(graph_df.index, graph_df['duration'], color='red', 
+                 marker='o', label=gt('graph.daily', lang))
+    elif len(graph_df) < 62:
+        ax.scatter(daily_df.index, daily_df['duration'], color='blue',
+                   marker='.', label=gt('graph.daily', lang))
+        ax.plot(weekly_average.index, weekly_average['duration'],
+                color='red', marker='o', label=gt('graph.weekly', lang))
+    else:
+        ax.scatter(daily_df.index, daily_df['duration'], color='gray',
+                   marker='.', label=gt('graph.daily', lang))
+        ax.plot(weekly_average.index, weekly_average['duration'],
+                color='blue', marker='.', linestyle='--',
+                label=gt('graph.weekly', lang))
+        ax.plot(monthly_average.index, monthly_average['duration'], 
+                color='red', marker='o', label=gt('graph.monthly', lang))
+
+    ax.set_title(gt('graph.title', lang))
+    ax.set_xlabel(gt('graph.dates', lang))
+    ax.set_ylabel(y_unit)
+
+    # Use AutoDateLocator to automatically select appropriate date 
+    # intervals
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+
+    # Use ConciseDateFormatter to make the date labels more readable 
+    # depending on the user's language
+    formatter = mdates.ConciseDateFormatter(locator)
+    formatter = localize_ConciseDateFormatter(formatter, lang)
+    ax.xaxis.set_major_formatter(formatter)
+
+    ax.legend()
+    ax.grid(True)
+
+    apply_style(fig, lang)
+
+    # Drawing the figure happens here, when it's saved
+    image = io.BytesIO()
+    with metrics.stage('render_png', rows=len(df)):
+        fig.savefig(image, format='png', bbox_inches='tight')
+    return image.getvalue()
+
+def render_heatmap(df: pd.DataFrame, year: int, lang: str = 'en-US') -> bytes:
+    """Render the hours spent each day of a year as a calendar heatmap 
+    of weeks by weekdays, like a GitHub contribution graph, as PNG image 
+    bytes. Days without any data are left gray.
+    """
+    first, grid = engine.calendar_index(df).year_grid(year)
+    hours = grid / 3600
+
+    # Label each month at the week its first day falls in
+    month_starts = (np.arange(f'{year}-01', f'{year + 1}-01',
+                              dtype='datetime64[M]')
+                    .astype('datetime64[D]').astype(np.int64))
+    month_labels = codec.to_datetimes(month_starts).strftime(
+        gt('heatmap.month_format', lang))
+
+    fig = Figure(figsize=(10, 2.2), dpi=150)
+    ax = fig.subplots()
+    cmap = mpl.colormaps['Greens'].with_extremes(bad='#ebedf0')
+    image_grid = ax.imshow(np.ma.masked_invalid(hours), cmap=cmap,
+                           vmin=0, aspect='equal',
+                           interpolation='nearest')
+
+    ax.set_xticks((month_starts - first) // 7, month_labels)
+    ax.set_yticks([1, 3, 5], gt('heatmap.weekdays', lang).split(','))
+    ax.tick_params(length=0, labelsize=8)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.set_title(gt('heatmap.title', lang).format(year))
+    fig.colorbar(image_grid, ax=ax, shrink=0.8, pad=0.02,
+                 label=gt('misc.hours', lang))
+
+    apply_style(fig, lang)
+
+    # Drawing the figure happens here, when it's saved
+    image = io.BytesIO()
+    with metrics.stage('render_png', rows=len(df)):
+        fig.savefig(image, format='png', bbox_inches='tight')
+    return image.getvalue()
@@ -0,0 +1,227 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+
+# Dates are stored as the number of days since this date
+epoch = dt.date(1970, 1, 1)
+
+# A day can't have a negative duration or one of 24 hours or more, so 
+# merged durations are capped at the longest valid one
+max_seconds = 24 * 3600 - 1
+
+# Offsets of the digits and colons in an 'HH:MM:SS' string
+_digit_cols = [0, 1, 3, 4, 6, 7]
+_colon_cols = [2, 5]
+
+def try_parse_durations(values) -> tuple[np.ndarray, np.ndarray]:
+    """Parse durations into int32 seconds, along with a mask of which 
+    values were valid. Invalid values are parsed as 0.
+    Strings in the 'HH:MM:SS' format used by this site's CSV files are
+    parsed as fixed-width characters in one vectorized pass. Any other
+    values are left to pd.to_timedelta.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'm':
+        return (values.astype('timedelta64[s]').astype(np.int32),
+                ~np.isnat(values))
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int32), np.ones(len(values), dtype=bool)
+
+    seconds = np.zeros(len(values), dtype=np.int32)
+    text = values.astype(str)
+    fixed_width = np.char.str_len(text) == 8
+    fast = np.zeros(len(values), dtype=bool)
+    if fixed_width.any():
+        # View each fixed-width string as its eight UCS-4 code points
+        rows = np.flatnonzero(fixed_width)
+        raw = (text[rows].astype('U8').view(np.uint32)
+               .reshape(-1, 8).astype(np.int64))
+        digits = raw[:, _digit_cols] - ord('0')
+        hh = digits[:, 0] * 10 + digits[:, 1]
+        mm = digits[:, 2] * 10 + digits[:, 3]
+        ss = digits[:, 4] * 10 + digits[:, 5]
+        valid = (((digits >= 0) & (digits <= 9)).all(axis=1)
+                 & (raw[:, _colon_cols] == ord(':')).all(axis=1)
+                 & (mm < 60) & (ss < 60))
+        rows = rows[valid]
+        seconds[rows] = (hh * 3600 + mm * 60 + ss)[valid]
+        fast[rows] = True
+
+    # Fall back to pandas for anything that isn't in the usual format
+    valid = fast.copy()
+    if not fast.all():
+        slow = pd.to_timedelta(values[~fast], errors='coerce')
+        slow_valid = ~slow.isna()
+        seconds[~fast] = np.where(
+            slow_valid, slow.total_seconds().fillna(0), 0).astype(np.int32)
+        valid[~fast] = slow_valid
+    return seconds, valid
+
+def parse_durations(values) -> np.ndarray:
+    """Parse durations into int32 seconds, raising a ValueError if any 
+    of them are missing or invalid.
+    """
+    seconds, valid = try_parse_durations(values)
+    if not valid.all():
+        raise ValueError('Missing or invalid duration')
+    return seconds
+
+def try_parse_dates(values) -> tuple[np.ndarray, np.ndarray]:
+    """Parse dates into int32 days since the epoch, along with a mask 
+    of which values were valid. Invalid values are parsed as 0.
+    ISO 'YYYY-MM-DD' strings are parsed by NumPy directly. Any other
+    values are left to pd.to_datetime.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int32), np.ones(len(values), dtype=bool)
+    try:
+        days = values.astype('datetime64[D]')
+    except ValueError:
+        days = (pd.to_datetime(values, errors='coerce').to_numpy()
+                .astype('datetime64[D]'))
+    valid = ~np.isnat(days)
+    return np.where(valid, days.astype(np.int64), 0).astype(np.int32), valid
+
+def parse_dates(values) -> np.ndarray:
+    """Parse dates into int32 days since the epoch, raising a 
+    ValueError if any of them are missing or invalid.
+    """
+    days, valid = try_parse_dates(values)
+    if not valid.all():
+        raise ValueError('Missing or invalid date')
+    return days
+
+def format_durations(seconds) -> np.ndarray:
+    """Format int seconds as 'HH:MM:SS' strings, building the
+    characters of every row at once.
+    """
+    seconds = np.asarray(seconds, dtype=np.int64)
+    # Keep only the time of day, like the components of a timedelta
+    hh = seconds // 3600 % 24
+    mm = seconds // 60 % 60
+    ss = seconds % 60
+    colon = np.full_like(seconds, ord(':') - ord('0'))
+    chars = np.stack([hh // 10, hh % 10, colon, mm // 10, mm % 10, colon,
+                      ss // 10, ss % 10], axis=1) + ord('0')
+    return chars.astype(np.uint8).view('S8').ravel().astype('U8')
+
+def format_dates(days) -> np.ndarray:
+    """Format int days since the epoch as 'YYYY-MM-DD' strings."""
+    return np.datetime_as_string(np.asarray(days).astype('datetime64[D]'))
+
+def date_to_day(date: dt.date) -> int:
+    """Convert a date to days since the epoch."""
+    return (date - epoch).days
+
+def day_to_date(day: int) -> dt.date:
+    """Convert days since the epoch to a date."""
+    return epoch + dt.timedelta(days=int(day))
+
+def make_frame(days, seconds) -> pd.DataFrame:
+    """Build a compact DataFrame with a 'date' column of int32 days
+    since the epoch and a 'duration' column of int32 seconds.
+    """
+    return pd.DataFrame({
+        'date': np.asarray(days, dtype=np.int32),
+        'duration': np.asarray(seconds, dtype=np.int32),
+        })
+
+def merge_dates(days: np.ndarray, seconds: np.ndarray) -> pd.DataFrame:
+    """Sort the days and durations by date and merge any duplicate
+    dates by adding their durations together, up to max_seconds.
+    Return a compact DataFrame.
+    """
+    order = np.argsort(days, kind='stable')
+    days, seconds = days[order], seconds[order]
+    if len(days) > 1 and (np.diff(days) == 0).any():
+        starts = np.flatnonzero(np.r_[True, np.diff(days) != 0])
+        days = days[starts]
+        seconds = np.minimum(np.add.reduceat(seconds, starts), max_seconds)
+    return make_frame(days, seconds)
+
+def merge_habit_dates(
+        codes: np.ndarray,
+        days: np.ndarray,
+        seconds: np.ndarray,
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sort the rows of several habits (identified by int codes) by 
+    habit and then date, and merge any duplicate dates of the same habit 
+    by adding their durations together, up to max_seconds.
+    Return the sorted codes, days, and durations.
+    """
+    order = np.lexsort((days, codes))
+    codes, days, seconds = codes[order], days[order], seconds[order]
+    if len(days) > 1:
+        new_row = np.r_[True, (np.diff(codes) != 0) | (np.diff(days) != 0)]
+        if not new_row.all():
+            starts = np.flatnonzero(new_row)
+            codes, days = codes[starts], days[starts]
+            seconds = np.minimum(np.add.reduceat(seconds, starts),
+                                 max_seconds)
+    return codes, days, seconds
+
+# Ways of combining the durations of a day recorded more than once
+duplicate_policies = ('latest', 'max', 'sum')
+
+def resolve_duplicates(
+        codes: np.ndarray,
+        days: np.ndarray,
+        seconds: np.ndarray,
+        ranks: np.ndarray,
+        policy: str = 'latest',
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sort rows of several habits gathered from several sources by 
+    habit and then date in one sort, and combine the durations of each 
+    day recorded more than once: 'latest' keeps the one with the 
+    highest rank, 'max' keeps the longest, and 'sum' adds them together 
+    up to max_seconds.
+    Return the sorted codes, days, and durations.
+    """
+    if policy not in duplicate_policies:
+        raise ValueError(f'Unknown duplicate policy: {policy}')
+    order = np.lexsort((ranks, days, codes))
+    codes, days, seconds = codes[order], days[order], seconds[order]
+    if len(days) > 1:
+        new_row = np.r_[True, (np.diff(codes) != 0) | (np.diff(days) != 0)]
+        if not new_row.all():
+            starts = np.flatnonzero(new_row)
+            if policy == 'sum':
+                merged = np.minimum(np.add.reduceat(seconds, starts),
+                                    max_seconds)
+            elif policy == 'max':
+                merged = np.maximum.reduceat(seconds, starts)
+            else:
+                # Each day's rows are sorted by rank, so take the last
+                merged = seconds[np.r_[starts[1:], len(seconds)] - 1]
+            codes, days, seconds = codes[starts], days[starts], merged
+    return codes, days, seconds
+
+def make_habit_frame(names, codes, days, seconds) -> pd.DataFrame:
+    """Build a compact DataFrame of several habits: a categorical 
+    'habit' column of the names, indexed by the codes, followed by the 
+    columns of make_frame.
+    """
+    df = make_frame(days, seconds)
+    df.insert(0, 'habit', pd.Categorical.from_codes(
+        np.asarray(codes, dtype=np.int32), categories=list(names)))
+    return df
+
+def encode_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a DataFrame of dates and durations in any supported
+    form (strings, datetimes and timedeltas, or already compact) into
+    a compact DataFrame.
+    """
+    return make_frame(parse_dates(df['date']),
+                      parse_durations(df['duration']))
+
+def to_datetimes(days) -> pd.DatetimeIndex:
+    """Convert int days since the epoch to datetimes for display."""
+    return pd.DatetimeIndex(
+        np.asarray(days).astype('datetime64[D]').astype('datetime64[ns]'))
+
+def to_timedeltas(seconds) -> pd.TimedeltaIndex:
+    """Convert int seconds to timedeltas for display."""
+    return pd.to_timedelta(np.asarray(seconds, dtype=np.int64), unit='s')
@@ -0,0 +1,17 @@
+import streamlit as st
+
+import scripts.metrics as metrics
+
+
+def debug_panel() -> None:
+    """Display the stages timed in this rerun and the totals exported to 
+    the metrics file. Only shown with '?debug=1' in the URL while 
+    metrics are enabled.
+    """
+    with st.expander('Debug: stage timings'):
+        st.table([{'stage': stage['stage'],
+                   'ms': round(stage['seconds'] * 1000, 2),
+                   'KiB allocated': round(stage['alloc_bytes'] / 1024, 1),
+                   'rows': stage['rows']}
+                  for stage in metrics.run_stages()])
+        st.code(metrics.exposition(), language='text')
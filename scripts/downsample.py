@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Downsample a series using Largest-Triangle-Three-Buckets, which
+    keeps the points that contribute most to the visual shape of the
+    series (peaks, dips, and trends).
+    Return the indices of the points to keep, always including the
+    first and last points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Split the points between the first and last into n_out - 2
+    # buckets, with the last point acting as a final bucket of its own
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(int), n)
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+
+        # Choose the point that forms the largest triangle with the
+        # previously kept point and the average of the next bucket
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
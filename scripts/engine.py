@@ -0,0 +1,448 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from config import Goal
+import scripts.codec as codec
+from scripts.aggregates import RunningAggregates
+from scripts.calendar_index import CalendarIndex
+import scripts.grouped as grouped
+from scripts.downsample import lttb
+from scripts.habit_stats import habit_stats
+from scripts.milestones import MilestoneIndex
+from scripts.i18n import get_translation as gt
+from scripts.localize import localize_dates
+
+
+# Everything in this module is plain pandas/NumPy so that insights can
+# be computed outside of a Streamlit session
+
+def calculate_averages(df: pd.DataFrame) -> dict:
+    """Calculate the totals and averages of a compact DataFrame.
+    Averages that there isn't enough data for are None.
+    """
+    return RunningAggregates.from_seconds(df['duration']).averages()
+
+def goal_projection(averages: dict, goal_hours: int) -> dict:
+    """Calculate the progress toward a goal number of hours and how
+    long it will take to reach it at the overall average so far.
+    """
+    total_hours = averages['total'].total_seconds() / 3600
+    avg_hours = total_hours / averages['count']
+    hours_remaining = max(goal_hours - total_hours, 0)
+    days_remaining = (hours_remaining / avg_hours if avg_hours > 0
+                      else math.inf)
+    return {
+        'goal_hours': goal_hours,
+        'total_hours': total_hours,
+        'reached': total_hours > goal_hours,
+        'percent_complete': total_hours / goal_hours * 100,
+        'hours_remaining': hours_remaining,
+        'avg_hours': avg_hours,
+        'days_remaining': days_remaining,
+        'years_remaining': days_remaining / 365,
+    }
+
+def goal_forecasts(
+        index: MilestoneIndex,
+        goal_hours: float,
+        windows: tuple[int, ...] = Goal.forecast_windows,
+        ) -> dict:
+    """Find the day the goal was reached, or else forecast the day it 
+    will be from the pace of each window of recent recorded days. 
+    Windows without enough days are left out, and the forecast day is 
+    None if the pace is zero.
+    """
+    forecasts = {}
+    if index.total <= goal_hours * 3600:
+        for window in windows:
+            rate = index.rate(window)
+            if rate is not None:
+                forecasts[window] = {'rate_hours': rate / 3600,
+                                     'day': index.forecast(goal_hours, rate)}
+    return {'reached_on': index.crossed(goal_hours), 'forecasts': forecasts}
+
+def milestone_timeline(
+        index: MilestoneIndex,
+        milestones: tuple[int, ...] = Goal.milestones,
+        ) -> list[dict]:
+    """Return the day each milestone number of hours was reached, or the 
+    day it will be at the overall average so far if it hasn't been yet.
+    """
+    crossed = index.crossings(milestones)
+    rate = index.rate()
+    return [{'hours': hours, 'reached': day is not None,
+             'day': day if day is not None else index.forecast(hours, rate)}
+            for hours, day in zip(milestones, crossed)]
+
+def calendar_index(df: pd.DataFrame) -> CalendarIndex:
+    """Lay out the durations of a compact DataFrame on a dense calendar
+    with the missing days masked.
+    """
+    return CalendarIndex(df['date'].to_numpy(), df['duration'].to_numpy())
+
+def resample_durations(df: pd.DataFrame) -> dict:
+    """Index the durations of a compact DataFrame by date and calculate
+    the weekly, monthly, yearly, and day-of-week means of the recorded 
+    days.
+    Durations are in minutes if the max is 2 hours or under, otherwise
+    in hours.
+    """
+    calendar = calendar_index(df)
+    scale = 60
+    unit = 'minutes'
+    if df['duration'].max() > 120 * 60:
+        scale = 3600
+        unit = 'hours'
+    week_ends, weekly = calendar.weekly_means()
+    month_ends, monthly = calendar.monthly_means()
+    year_ends, yearly = calendar.yearly_means()
+    return {
+        'unit': unit,
+        'daily': pd.Series(df['duration'].to_numpy() / scale,
+                           index=codec.to_datetimes(df['date'])),
+        'weekly': pd.Series(weekly / scale,
+                            index=codec.to_datetimes(week_ends)),
+        'monthly': pd.Series(monthly / scale,
+                             index=codec.to_datetimes(month_ends)),
+        'yearly': pd.Series(yearly / scale,
+                            index=codec.to_datetimes(year_ends)),
+        'weekday': calendar.weekday_means() / scale,
+        'missing_days': calendar.missing_days,
+    }
+
+def grouped_insights(
+        days: np.ndarray,
+        seconds: np.ndarray,
+        offsets: np.ndarray,
+        ) -> dict:
+    """Calculate the averages and resamples of several habits in one 
+    pass over all of their days, concatenated with the habit i taking 
+    up offsets[i]:offsets[i + 1] (see scripts.grouped). Habits must not 
+    be empty.
+    Return a summary DataFrame with one row per habit, along with lists 
+    of each habit's averages and resamples in the same form as 
+    calculate_averages and resample_durations.
+    """
+    days = np.asarray(days, dtype=np.int64)
+    seconds = np.asarray(seconds, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    starts, ends = offsets[:-1], offsets[1:]
+    counts = ends - starts
+    totals = np.add.reduceat(seconds, starts)
+    window_totals = {n: grouped.window_sums(seconds, offsets, n)
+                     for n in RunningAggregates.windows}
+    spans = days[ends - 1] - days[starts] + 1
+
+    # Minutes if a habit's max is 2 hours or under, otherwise hours
+    hourly = np.maximum.reduceat(seconds, starts) > 120 * 60
+    scales = np.where(hourly, 3600, 60)
+    week_ends, weekly, week_offsets = grouped.weekly_means(
+        days, seconds, offsets)
+    month_ends, monthly, month_offsets = grouped.calendar_means(
+        days, seconds, offsets, 'M')
+    year_ends, yearly, year_offsets = grouped.calendar_means(
+        days, seconds, offsets, 'Y')
+    weekdays = grouped.weekday_means(days, seconds, offsets)
+
+    def period_series(ends, means, period_offsets, i):
+        part = slice(period_offsets[i], period_offsets[i + 1])
+        return pd.Series(means[part] / scales[i],
+                         index=codec.to_datetimes(ends[part]))
+
+    averages, resampled = [], []
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        count = int(counts[i])
+        averages.append({
+            'count': count,
+            'total': pd.Timedelta(seconds=int(totals[i])),
+            'overall': (pd.Timedelta(seconds=int(totals[i]) / count)
+                        if count >= 2 else None),
+            **{f'last{n}': (pd.Timedelta(seconds=int(window_totals[n][i]) / n)
+                            if count > n else None)
+               for n in RunningAggregates.windows},
+            })
+        resampled.append({
+            'unit': 'hours' if hourly[i] else 'minutes',
+            'daily': pd.Series(seconds[start:end] / scales[i],
+                               index=codec.to_datetimes(days[start:end])),
+            'weekly': period_series(week_ends, weekly, week_offsets, i),
+            'monthly': period_series(month_ends, monthly, month_offsets, i),
+            'yearly': period_series(year_ends, yearly, year_offsets, i),
+            'weekday': weekdays[i] / scales[i],
+            'missing_days': int(spans[i] - count),
+            })
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary = pd.DataFrame({
+            'days': counts,
+            'missing_days': spans - counts,
+            'total_hours': totals / 3600,
+            'overall_hours': np.where(counts >= 2, totals / counts / 3600,
+                                      np.nan),
+            **{f'last{n}_hours': np.where(counts > n,
+                                          window_totals[n] / n / 3600, np.nan)
+               for n in RunningAggregates.windows},
+            })
+    return {'summary': summary, 'averages': averages, 'resampled': resampled}
+
+def grouped_goal_progress(summary: pd.DataFrame, goal_hours) -> pd.DataFrame:
+    """Calculate the progress of every habit in a summary from
+    grouped_insights toward its goal number of hours, in the same way
+    as goal_projection.
+    """
+    goal_hours = np.asarray(goal_hours, dtype=float)
+    total_hours = summary['total_hours'].to_numpy()
+    avg_hours = total_hours / summary['days'].to_numpy()
+    hours_remaining = np.maximum(goal_hours - total_hours, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        days_remaining = np.where(avg_hours > 0, hours_remaining / avg_hours,
+                                  np.inf)
+    return summary.assign(
+        goal_hours=goal_hours,
+        reached=total_hours > goal_hours,
+        percent_complete=total_hours / goal_hours * 100,
+        days_remaining=days_remaining,
+        )
+
+def chart_rollups(
+        df: pd.DataFrame,
+        max_points: int,
+        resampled: dict | None = None,
+        ) -> dict:
+    """Pre-aggregate a compact DataFrame for an interactive graph: the 
+    daily durations (downsampled past max_points, keeping their shape) 
+    and the weekly, monthly, and yearly means, as one long DataFrame of 
+    date, level, and duration in the unit of resample_durations. Its 
+    result is used if it was already calculated.
+    Like the static graph, weekly means are only included if there are 
+    at least 15 days and monthly means if there are at least 62. Yearly 
+    means are included once the data spans more than one year.
+    """
+    if resampled is None:
+        resampled = resample_durations(df)
+    daily = resampled['daily']
+    if len(daily) > max_points:
+        daily = daily.iloc[lttb(df['date'].to_numpy(), daily.to_numpy(),
+                                max_points)]
+    levels = {'daily': daily}
+    if len(df) >= 15:
+        levels['weekly'] = resampled['weekly']
+    if len(df) >= 62:
+        levels['monthly'] = resampled['monthly']
+    if len(resampled['yearly']) > 1:
+        levels['yearly'] = resampled['yearly']
+    # Periods without any recorded days have no mean to draw
+    rollups = pd.concat(
+        [pd.DataFrame({'date': means.index, 'level': level,
+                       'duration': means.to_numpy()})
+         for level, means in levels.items()],
+        ignore_index=True,
+        ).dropna()
+    return {'unit': resampled['unit'], 'rollups': rollups}
+
+def average_lines(averages: dict, lang: str = 'en-US') -> list[str]:
+    """Describe the averages in the user's language.
+    Overall - if there are at least 2 days.
+    Last 7 days - if there are over 7 days.
+    Last 30 days - if there are over 30 days.
+    """
+    lines = []
+    if averages['overall'] is None:
+        lines.append(gt('avg.not_enough', lang))
+    else:
+        avg_duration = averages['overall']
+        lines.append(gt('avg.overall', lang).format(
+            averages['count'],
+            avg_duration.components.hours,
+            avg_duration.components.minutes,
+            ))
+    if averages['last7'] is not None:
+        last7avg = averages['last7']
+        lines.append(gt('avg.last7', lang).format(
+            last7avg.components.hours,
+            last7avg.components.minutes,
+            ))
+    if averages['last30'] is not None:
+        last30avg = averages['last30']
+        lines.append(gt('avg.last30', lang).format(
+            last30avg.components.hours,
+            last30avg.components.minutes,
+            ))
+    return lines
+
+def habit_statistics(df: pd.DataFrame) -> dict:
+    """Compute the streaks, rolling means, percentiles, zero-day rate,
+    and day-of-week profile of a compact DataFrame together.
+    """
+    return habit_stats(df['date'].to_numpy(), df['duration'].to_numpy())
+
+def _hr_min(seconds: float) -> tuple[int, int]:
+    """Split a duration in seconds into whole hours and minutes."""
+    return divmod(int(seconds) // 60, 60)
+
+def stat_lines(stats: dict, lang: str = 'en-US') -> list[str]:
+    """Describe the statistics in the user's language. 
+    Rolling averages of the last 7 and 30 days are left to 
+    average_lines, so only the longer windows' are described here.
+    """
+    if stats['days'] < 2:
+        return [gt('stats.not_enough', lang)]
+    lines = [gt('stats.current', lang).format(stats['current_streak'])]
+    if stats['longest_streak_end'] is not None:
+        lines.append(gt('stats.longest', lang).format(
+            stats['longest_streak'],
+            localize_dates([stats['longest_streak_end']], lang)[0],
+            ))
+    lines.append(gt('stats.zero', lang).format(
+        stats['zero_days'], stats['span'], f"{stats['zero_rate'] * 100:.0f}"))
+    lines.append(gt('stats.percentiles', lang).format(
+        gt('stats.separator', lang).join(
+            gt('stats.percentile', lang).format(p, *_hr_min(value))
+            for p, value in stats['percentiles'].items())))
+    for window, rolling in stats['rolling'].items():
+        if window not in RunningAggregates.windows:
+            lines.append(gt('stats.latest', lang).format(
+                window, *_hr_min(rolling['latest'])))
+        lines.append(gt('stats.best', lang).format(
+            window, *_hr_min(rolling['best']),
+            localize_dates([rolling['best_end']], lang)[0],
+            ))
+    weekdays = gt('stats.weekdays', lang).split(',')
+    lines.append(gt('stats.weekday', lang).format(
+        gt('stats.separator', lang).join(
+            f'{name} ' + ('-' if np.isnan(mean)
+                          else '{}:{:02d}'.format(*_hr_min(mean)))
+            for name, mean in zip(weekdays, stats['weekday']))))
+    return lines
+
+def goal_line(projection: dict, lang: str = 'en-US') -> str:
+    """Describe the progress toward the goal in the user's language."""
+    if projection['reached']:
+        return gt('goal.reached', lang)
+    return gt('goal.progress', lang).format(
+        f"{projection['total_hours']:.1f}", f"{projection['goal_hours']}",
+        f"{projection['percent_complete']:.0f}",
+        f"{projection['avg_hours']:.1f}",
+        f"{projection['days_remaining']:.0f}",
+        f"{projection['years_remaining']:.2f}",
+        )
+
+def forecast_lines(forecasts: dict, lang: str = 'en-US') -> list[str]:
+    """Describe when the goal was reached, or when it will be at each 
+    recent pace, in the user's language.
+    """
+    if forecasts['reached_on'] is not None:
+        return [gt('goal.reached_on', lang).format(
+            localize_dates([forecasts['reached_on']], lang)[0])]
+    lines = []
+    for window, forecast in forecasts['forecasts'].items():
+        if forecast['day'] is None:
+            lines.append(gt('goal.never', lang).format(window))
+        else:
+            lines.append(gt('goal.forecast', lang).format(
+                window, f"{forecast['rate_hours']:.1f}",
+                localize_dates([forecast['day']], lang)[0]))
+    return lines
+
+def milestone_lines(timeline: list[dict], lang: str = 'en-US') -> list[str]:
+    """Describe when each milestone was or will be reached in the user's 
+    language.
+    """
+    lines = []
+    for milestone in timeline:
+        hours = f"{milestone['hours']:,}"
+        if milestone['day'] is None:
+            lines.append(gt('goal.milestone_never', lang).format(hours))
+        else:
+            key = 'milestone_reached' if milestone['reached'] else 'milestone'
+            lines.append(gt(f'goal.{key}', lang).format(
+                hours, localize_dates([milestone['day']], lang)[0]))
+    return lines
+
+def _iso_date(day: int | None) -> str | None:
+    """Convert an int day since the epoch to an ISO date string, keeping
+    None as is.
+    """
+    return None if day is None else codec.day_to_date(day).isoformat()
+
+def _hours(td: pd.Timedelta | None) -> float | None:
+    """Convert a timedelta to hours, keeping None as is."""
+    return None if td is None else td.total_seconds() / 3600
+
+def _finite(value: float) -> float | None:
+    """Replace infinite and NaN values with None so they can be saved as 
+    JSON.
+    """
+    return value if math.isfinite(value) else None
+
+def habit_report(
+        df: pd.DataFrame,
+        goal_hours: int = 10000,
+        lang: str = 'en-US',
+        ) -> dict:
+    """Compute all the insights for a compact DataFrame as a
+    JSON-serializable dict, including the same localized descriptions
+    shown on the site.
+    """
+    averages = calculate_averages(df)
+    projection = goal_projection(averages, goal_hours)
+    resampled = resample_durations(df)
+    to_hours = 1 if resampled['unit'] == 'hours' else 1 / 60
+    # Weeks and months without any recorded days have no mean
+    weekly = resampled['weekly'].dropna() * to_hours
+    monthly = resampled['monthly'].dropna() * to_hours
+    weekday = resampled['weekday'] * to_hours
+    stats = habit_statistics(df)
+    index = MilestoneIndex(df['date'].to_numpy(), df['duration'].to_numpy())
+    forecasts = goal_forecasts(index, goal_hours)
+    return {
+        'days': averages['count'],
+        'missing_days': resampled['missing_days'],
+        'first_date': codec.day_to_date(df['date'].iloc[0]).isoformat(),
+        'last_date': codec.day_to_date(df['date'].iloc[-1]).isoformat(),
+        'average_hours': {
+            'overall': _hours(averages['overall']),
+            'last7': _hours(averages['last7']),
+            'last30': _hours(averages['last30']),
+            },
+        'goal': {key: (_finite(value) if isinstance(value, float) else value)
+                 for key, value in projection.items()},
+        'weekly_hours': {
+            'dates': weekly.index.strftime('%Y-%m-%d').tolist(),
+            'hours': weekly.tolist(),
+            },
+        'monthly_hours': {
+            'dates': monthly.index.strftime('%Y-%m-%d').tolist(),
+            'hours': monthly.tolist(),
+            },
+        # Monday to Sunday, None for weekdays that were never recorded
+        'weekday_hours': [_finite(hours) for hours in weekday.tolist()],
+        'streaks': {
+            'current_days': stats['current_streak'],
+            'longest_days': stats['longest_streak'],
+            'longest_end': _iso_date(stats['longest_streak_end']),
+            },
+        'zero_day_rate': stats['zero_rate'],
+        'percentile_hours': {str(p): value / 3600
+                             for p, value in stats['percentiles'].items()},
+        'rolling_hours': {
+            str(window): {'latest': rolling['latest'] / 3600,
+                          'best': rolling['best'] / 3600,
+                          'best_end': _iso_date(rolling['best_end'])}
+            for window, rolling in stats['rolling'].items()},
+        'goal_reached_on': _iso_date(forecasts['reached_on']),
+        'goal_forecasts': {
+            str(window): {'rate_hours': forecast['rate_hours'],
+                          'date': _iso_date(forecast['day'])}
+            for window, forecast in forecasts['forecasts'].items()},
+        'milestones': {str(milestone['hours']): {
+                           'reached': milestone['reached'],
+                           'date': _iso_date(milestone['day'])}
+                       for milestone in milestone_timeline(index)},
+        'summary': (average_lines(averages, lang)
+                    + stat_lines(stats, lang)
+                    + [goal_line(projection, lang)]
+                    + forecast_lines(forecasts, lang)),
+    }
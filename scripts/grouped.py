@@ -0,0 +1,88 @@
+import numpy as np
+
+from scripts.calendar_index import weekday
+
+
+# Several habits are reduced at once from their days and durations
+# concatenated one habit after another, each sorted by date, with the
+# habit i taking up offsets[i]:offsets[i + 1]. Every reduction is one
+# pass over all of the days rather than one per habit.
+
+def group_ids(offsets: np.ndarray) -> np.ndarray:
+    """Return the group of each row."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+def window_sums(seconds: np.ndarray, offsets: np.ndarray, days: int
+                ) -> np.ndarray:
+    """Total duration of the last `days` recorded days of each group, or
+    of all of its days if it has fewer.
+    """
+    cumulative = np.r_[0, np.cumsum(seconds, dtype=np.int64)]
+    starts = np.maximum(offsets[1:] - days, offsets[:-1])
+    return cumulative[offsets[1:]] - cumulative[starts]
+
+def period_means(
+        periods: np.ndarray,
+        seconds: np.ndarray,
+        offsets: np.ndarray,
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mean duration of the recorded days of each period (such as week
+    or month numbers, which must be sorted within each group), from
+    each group's first period to its last. Periods without any recorded
+    days are NaN.
+    Return the periods and means of every group concatenated, along
+    with the offsets of each group within them. Groups must not be
+    empty.
+    """
+    groups = group_ids(offsets)
+    first = periods[offsets[:-1]]
+    last = periods[offsets[1:] - 1]
+    period_offsets = np.r_[0, np.cumsum(last - first + 1)]
+    slots = period_offsets[groups] + periods - first[groups]
+    n_slots = int(period_offsets[-1])
+    totals = np.bincount(slots, weights=seconds, minlength=n_slots)
+    counts = np.bincount(slots, minlength=n_slots)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = totals / counts
+    slot_groups = group_ids(period_offsets)
+    labels = (first[slot_groups] + np.arange(n_slots)
+              - period_offsets[slot_groups])
+    return labels, means, period_offsets
+
+def weekly_means(days: np.ndarray, seconds: np.ndarray, offsets: np.ndarray
+                 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mean duration of each Monday to Sunday week of each group,
+    labeled by the Sunday that ends it like CalendarIndex.weekly_means.
+    """
+    # Weeks numbered from the one starting Monday, 1969-12-29
+    weeks = (days.astype(np.int64) + 3) // 7
+    labels, means, week_offsets = period_means(weeks, seconds, offsets)
+    return labels * 7 + 3, means, week_offsets
+
+def calendar_means(
+        days: np.ndarray,
+        seconds: np.ndarray,
+        offsets: np.ndarray,
+        unit: str,
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mean duration of each month ('M') or year ('Y') of each group,
+    labeled by its last day like CalendarIndex.monthly_means.
+    """
+    periods = (days.astype('datetime64[D]').astype(f'datetime64[{unit}]')
+               .astype(np.int64))
+    labels, means, period_offsets = period_means(periods, seconds, offsets)
+    ends = ((labels + 1).astype(f'datetime64[{unit}]')
+            .astype('datetime64[D]').astype(np.int64) - 1)
+    return ends, means, period_offsets
+
+def weekday_means(days: np.ndarray, seconds: np.ndarray, offsets: np.ndarray
+                  ) -> np.ndarray:
+    """Mean duration of the recorded days falling on each weekday, from
+    Monday to Sunday, shaped groups x 7. NaN for weekdays never recorded.
+    """
+    slots = group_ids(offsets) * 7 + weekday(days)
+    n_slots = (len(offsets) - 1) * 7
+    totals = np.bincount(slots, weights=seconds, minlength=n_slots)
+    counts = np.bincount(slots, minlength=n_slots)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (totals / counts).reshape(-1, 7)
@@ -0,0 +1,74 @@
+import numpy as np
+
+from config import Insights
+import scripts.grouped as grouped
+
+
+# Every statistic of a habit comes from the same few arrays built once
+# over its days: the running total of the recorded durations, a dense
+# mask of the days with any time spent, and one partial sort of the
+# durations. Adding another window or percentile slices these arrays
+# again instead of scanning the data again.
+
+def habit_stats(
+        days: np.ndarray,
+        seconds: np.ndarray,
+        windows: tuple[int, ...] = Insights.windows,
+        percentiles: tuple[int, ...] = Insights.percentiles,
+        ) -> dict:
+    """Compute the streaks, rolling means, percentiles, zero-day rate,
+    and day-of-week profile of one habit's sorted int days since the
+    epoch and durations in seconds. Durations are in seconds and dates
+    in days since the epoch.
+    Rolling means are over recorded days like the last 7 and 30 day
+    averages, and only windows with enough days are included.
+    """
+    days = np.asarray(days, dtype=np.int64)
+    seconds = np.asarray(seconds, dtype=np.int64)
+    n = len(seconds)
+    if n == 0:
+        return {'days': 0}
+    cumulative = np.r_[0, np.cumsum(seconds)]
+
+    # Rolling means of every window are differences of the running total
+    rolling = {}
+    for window in windows:
+        if n < window:
+            continue
+        means = (cumulative[window:] - cumulative[:-window]) / window
+        best = int(means.argmax())
+        rolling[window] = {
+            'latest': float(means[-1]),
+            'best': float(means[best]),
+            'best_end': int(days[best + window - 1]),
+        }
+
+    # A streak is a run of consecutive calendar days with time spent, so
+    # both days recorded as zero and days never recorded break it
+    first = int(days[0])
+    span = int(days[-1]) - first + 1
+    active = np.zeros(span, dtype=np.int8)
+    active[days - first] = seconds > 0
+    edges = np.flatnonzero(np.diff(np.r_[np.int8(0), active, np.int8(0)]))
+    starts, ends = edges[::2], edges[1::2]
+    lengths = ends - starts
+    longest = int(lengths.argmax()) if len(lengths) else None
+    active_days = int(lengths.sum())
+
+    return {
+        'days': n,
+        'span': span,
+        'current_streak': (int(lengths[-1])
+                           if len(lengths) and ends[-1] == span else 0),
+        'longest_streak': 0 if longest is None else int(lengths[longest]),
+        'longest_streak_end': (None if longest is None
+                               else first + int(ends[longest]) - 1),
+        'zero_days': span - active_days,
+        'zero_rate': (span - active_days) / span,
+        'rolling': rolling,
+        'percentiles': dict(zip(
+            percentiles,
+            np.percentile(seconds, percentiles).tolist())),
+        # Monday to Sunday, NaN for weekdays never recorded
+        'weekday': grouped.weekday_means(days, seconds, np.array([0, n]))[0],
+    }
@@ -1,131 +1,495 @@
+import json
 import datetime as dt
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 
+import scripts.codec as codec
 import scripts.data_insights as data
+import scripts.engine as engine
+import scripts.metrics as metrics
+import scripts.store as store
+from scripts.aggregates import RunningAggregates
+from scripts.milestones import MilestoneIndex
+from scripts.cache import get_or_compute
 from scripts.i18n import get_translation as gt
-from scripts.i18n import localize_df_data, date_to_localized_string
-from config import Lang
+from scripts.i18n import date_to_localized_string
+from scripts.localize import localize_df_data
+from scripts.series import HabitSeries, HabitSet
+from config import Lang, Chart, Backfill, Table
 
-def show_all_data_info(df: pd.DataFrame) -> None:
-    """Display averages, goal progress, and a graph of the data."""
+# File extensions and MIME types of the formats data can be downloaded in
+download_formats = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Feather': ('feather', 'application/vnd.apache.arrow.file'),
+}
 
-    df_copy = df.copy()
+def compute_insights(series: HabitSeries) -> dict:
+    """Compute the insights show_all_data_info displays: the averages."""
+    with metrics.stage('averages', rows=len(series)):
+        return {
+            'averages': engine.calculate_averages(series.frame()),
+        }
 
-    # Ensure the 'date' column is of datetime type and the 'duration' 
-    # column of timedelta type
-    df_copy['date'] = pd.to_datetime(df_copy['date'])
-    df_copy['duration'] = pd.to_timedelta(df_copy['duration'])
+def compute_stats(series: HabitSeries) -> dict:
+    """Compute the streaks, rolling means, percentiles, and day-of-week 
+    profile of the data in one pass, only once per data hash.
+    """
+    def compute() -> dict:
+        with metrics.stage('stats', rows=len(series)):
+            return engine.habit_statistics(series.frame())
+    return get_or_compute(('stats', series.hash), compute)
+
+def resample(series: HabitSeries) -> dict:
+    """Resample the durations of the data by week, month, and year for 
+    its graph, only once per data hash. The habits of a multi-habit 
+    file are all resampled at once by compute_habit_set.
+    """
+    def compute() -> dict:
+        with metrics.stage('resample', rows=len(series)):
+            return engine.resample_durations(series.frame())
+    return get_or_compute(('resample', series.hash), compute)
+
+def render_graph(
+        df: pd.DataFrame,
+        lang: str,
+        resampled: dict | None = None,
+        ) -> bytes:
+    """Render a graph of a compact DataFrame as PNG image bytes.
+    matplotlib is only imported the first time a graph is rendered so 
+    that it doesn't slow down starting the site.
+    """
+    import scripts.charts as charts
+    return charts.render_graph(df, lang, resampled)
+
+def render_heatmap(df: pd.DataFrame, year: int, lang: str) -> bytes:
+    """Render a calendar heatmap of one year of a compact DataFrame as 
+    PNG image bytes, importing matplotlib the first time it's needed.
+    """
+    import scripts.charts as charts
+    return charts.render_heatmap(df, year, lang)
+
+def compute_rollups(series: HabitSeries) -> dict:
+    """Pre-aggregate the data for an interactive graph."""
+    # Resampling is timed as its own stage, which can't be nested
+    resampled = resample(series)
+    with metrics.stage('rollups', rows=len(series)):
+        return engine.chart_rollups(series.frame(), Chart.max_points,
+                                    resampled)
+
+def build_interactive_graph(series: HabitSeries, lang: str) -> dict:
+    """Build an interactive Altair graph of the data from its cached 
+    rollups, as its Vega-Lite spec. The spec is what gets cached, since 
+    the chart object's size doesn't count the data embedded in it. 
+    Altair is only imported the first time a graph is built.
+    """
+    import scripts.altair_charts as altair_charts
+    rollups = get_or_compute(('rollups', series.hash, Chart.max_points),
+                             lambda: compute_rollups(series))
+    return altair_charts.build_graph(rollups['rollups'], rollups['unit'],
+                                     lang).to_dict()
+
+def show_all_data_info(
+        series: HabitSeries,
+        aggregates: RunningAggregates | None = None,
+        milestones: MilestoneIndex | None = None,
+        ) -> None:
+    """Display averages, statistics, goal progress, and a graph of the 
+    data.
+    If running aggregates and a milestone index are being kept 
+    alongside the data, the averages and goal forecasts are read from 
+    them directly.
+    """
+
+    # Reruns with the same data reuse the cached insights and graph. 
+    # The graph is also keyed on the language and the point budget 
+    # it was downsampled to.
+    insights = get_or_compute(('insights', series.hash),
+                              lambda: compute_insights(series))
+    stats = compute_stats(series)
+    if Chart.backend == 'altair':
+        graph = get_or_compute(
+            ('interactive_graph', series.hash, Lang.lang, Chart.max_points),
+            lambda: build_interactive_graph(series, Lang.lang),
+            )
+    else:
+        graph = get_or_compute(
+            ('graph', series.hash, Lang.lang, Chart.max_points),
+            lambda: render_graph(series.frame(), Lang.lang,
+                                 resample(series)),
+            )
+    if aggregates is None:
+        averages = insights['averages']
+    else:
+        averages = aggregates.averages()
+    if milestones is None:
+        milestones = get_or_compute(
+            ('milestones', series.hash),
+            lambda: MilestoneIndex(series.days, series.seconds))
 
     c1, c2 = st.columns([1, 2])
     with c1:
-        data.daily_averages(df_copy)
+        data.daily_averages(averages)
+        st.divider()
+        data.habit_statistics(stats)
         st.divider()
-        data.goal_progress(df_copy)
+        data.goal_progress(averages, milestones)
         st.divider()
     with c2:
-        data.graph_data(df_copy)
+        if Chart.backend == 'altair':
+            data.interactive_graph(graph)
+        else:
+            data.graph_data(graph)
     st.divider()
+    show_heatmap(series)
     with st.expander(gt('misc.show_all', Lang.lang)):
-        st.dataframe(localize_df_data(df_copy, Lang.lang),
-                     use_container_width=True)
+        show_table(series, key='all_days')
+
+def compute_habit_set(habit_set: HabitSet) -> pd.DataFrame:
+    """Calculate the averages and resamples of every habit in a set in 
+    one grouped pass. They're cached under each habit's own series 
+    hash, where show_all_data_info finds them, so only a summary with 
+    one row per habit is returned for the set.
+    """
+    with metrics.stage('grouped_insights',
+                       rows=sum(len(s) for _, s in habit_set.items())):
+        grouped = engine.grouped_insights(*habit_set.arrays())
+    for (_, series), averages, resampled in zip(
+            habit_set.items(), grouped['averages'], grouped['resampled']):
+        get_or_compute(('insights', series.hash),
+                       lambda: {'averages': averages})
+        get_or_compute(('resample', series.hash), lambda: resampled)
+    return grouped['summary'].set_axis(habit_set.names)
+
+def habit_goals() -> dict[str, int]:
+    """Return the goal of every habit in the session's multi-habit 
+    file, including the one being entered for the current habit.
+    """
+    goals = dict(st.session_state.habit_goals)
+    if 'loaded_habit' in st.session_state:
+        goals[st.session_state.loaded_habit] = st.session_state.get(
+            'user_goal', 10000)
+    return goals
 
-def update_data(df: pd.DataFrame, date_cursor: dt.date) -> pd.DataFrame:
+def show_habit_overview(habit_set: HabitSet) -> None:
+    """Display the totals, averages, and goal progress of every habit 
+    in a multi-habit file in one table.
+    """
+    summary = get_or_compute(('habit_set', habit_set.hash),
+                             lambda: compute_habit_set(habit_set))
+    goals = habit_goals()
+    progress = engine.grouped_goal_progress(
+        summary, [goals.get(name, 10000) for name in summary.index])
+
+    st.write(gt('habits.heading', Lang.lang))
+    columns = {
+        'days': 'habits.days',
+        'total_hours': 'habits.total',
+        'overall_hours': 'habits.overall',
+        'last7_hours': 'habits.last7',
+        'last30_hours': 'habits.last30',
+        'goal_hours': 'habits.goal',
+        'percent_complete': 'habits.percent',
+    }
+    table = progress[list(columns)].rename(
+        columns={column: gt(key, Lang.lang) for column, key in columns.items()})
+    table.index.name = gt('habits.habit', Lang.lang)
+    st.dataframe(
+        table,
+        use_container_width=True,
+        column_config={
+            gt(key, Lang.lang): st.column_config.NumberColumn(format='%.1f')
+            for column, key in columns.items()
+            if column not in ('days', 'goal_hours')
+            },
+        )
+
+def select_habit(habit_set: HabitSet) -> None:
+    """Let the user choose which habit of a multi-habit file to update 
+    and see in detail. The chosen habit is loaded into session_state in 
+    the same way as the data of a single habit, and its goal is kept 
+    while another habit is chosen.
+    """
+    name = st.selectbox(gt('habits.select', Lang.lang), habit_set.names,
+                        key='current_habit')
+    if st.session_state.get('loaded_habit') == name:
+        return
+
+    # Keep the goal entered for the previous habit, and clear what was 
+    # being entered for it
+    previous = st.session_state.get('loaded_habit')
+    if previous is not None:
+        st.session_state.habit_goals[previous] = st.session_state.get(
+            'user_goal', 10000)
+    for key in ('date_cursor', 'update_data_aggregates',
+                'update_data_milestones', 'bulk_grid'):
+        st.session_state.pop(key, None)
+    st.session_state.habit_series = habit_set[name]
+    st.session_state.user_goal = st.session_state.habit_goals.get(name, 10000)
+    st.session_state.loaded_habit = name
+
+def show_heatmap(series: HabitSeries) -> None:
+    """Display a calendar heatmap of the chosen year of the data. It's 
+    only rendered once the user asks for it.
+    """
+    if not st.toggle(gt('heatmap.show', Lang.lang), key='show_heatmap'):
+        return
+    years = list(range(series.last_date.year, series.first_date.year - 1, -1))
+    year = st.selectbox(gt('heatmap.year', Lang.lang), years,
+                        key='heatmap_year')
+    heatmap_png = get_or_compute(
+        ('heatmap', series.hash, year, Lang.lang),
+        lambda: render_heatmap(series.frame(), year, Lang.lang),
+        )
+    st.image(heatmap_png, use_column_width=True)
+
+def show_table(
+        series: HabitSeries,
+        key: str,
+        newest_first: bool = False,
+        ) -> None:
+    """Display the data as a localized table. Longer tables are split 
+    into pages so that only one page is sent to the browser per rerun.
+    """
+    # The localized table is cached since it only depends on the data 
+    # and the language
+    def localize() -> pd.DataFrame:
+        with metrics.stage('localize_table', rows=len(series)):
+            return localize_df_data(series.frame(), Lang.lang)
+    localized = get_or_compute(('table', series.hash, Lang.lang), localize)
+    n_rows = len(localized)
+
+    start, end = 0, n_rows
+    if n_rows > Table.page_rows:
+        n_pages = -(-n_rows // Table.page_rows)
+        page = st.number_input(gt('misc.page', Lang.lang), min_value=1,
+                               max_value=n_pages, value=1, step=1,
+                               format='%d', key=f'{key}_page')
+        start = (page - 1) * Table.page_rows
+        end = min(start + Table.page_rows, n_rows)
+        st.caption(gt('misc.rows', Lang.lang).format(start + 1, end, n_rows))
+
+    # Only the rows of the page are taken (and reversed if needed) 
+    # rather than the whole table
+    if newest_first:
+        localized = localized.iloc[n_rows - end:n_rows - start].iloc[::-1]
+    else:
+        localized = localized.iloc[start:end]
+
+    with metrics.stage('show_table', rows=len(localized)):
+        st.dataframe(localized, use_container_width=True)
+
+def update_data(series: HabitSeries, date_cursor: dt.date) -> HabitSeries:
     """Given the currently recorded dates and durations, prompt the 
     user to enter data for each day up to the present day. 
     Return the data with every rerun of the page because of Streamlit's 
     repeated top-down execution.
     """
-    # Initialize new session_state variables for the parameters
-    if 'update_data_df' not in st.session_state:
-        st.session_state.update_data_df = df.copy()
+    # Initialize new session_state variables for the parameters. The 
+    # series is the only copy of the data kept in the session.
+    if 'habit_series' not in st.session_state:
+        st.session_state.habit_series = series
     if 'date_cursor' not in st.session_state:
         st.session_state.date_cursor = date_cursor
 
-    # Ensure the 'date' column is of datetime type and the 'duration' 
-    # column of timedelta type
-    st.session_state.update_data_df['date'] = pd.to_datetime(
-        st.session_state.update_data_df['date']
-        )
-    st.session_state.update_data_df['duration'] = pd.to_timedelta(
-        st.session_state.update_data_df['duration']
-        )
+    # Keep running totals next to the data so that recording a day 
+    # doesn't require rescanning the whole history. For a habit stored 
+    # on the server, the database sums the history instead.
+    if 'update_data_aggregates' not in st.session_state:
+        if 'store_habit_id' in st.session_state:
+            st.session_state.update_data_aggregates = store.aggregates(
+                st.session_state.store_habit_id)
+        else:
+            st.session_state.update_data_aggregates = (
+                RunningAggregates.from_seconds(
+                    st.session_state.habit_series.seconds)
+                )
+    # Likewise for the running total after each day that goal forecasts 
+    # are read from
+    if 'update_data_milestones' not in st.session_state:
+        st.session_state.update_data_milestones = MilestoneIndex(
+            st.session_state.habit_series.days,
+            st.session_state.habit_series.seconds)
 
     # Check if the data needs to be updated
     today = dt.datetime.today().date()
     if st.session_state.date_cursor > today:
-        return st.session_state.update_data_df
+        return st.session_state.habit_series
     else:
-        st.write(gt('update.not_up2date', Lang.lang))
+        backfill()
 
-        # Define the form container and write the date in question
-        duration_form = st.form('duration_form')
-        formatted_date = date_to_localized_string(st.session_state.date_cursor)
-        duration_form.write(gt('update.enter', Lang.lang).format(formatted_date))
+        # Return a valid value to the caller function with every rerun 
+        # of the page
+        return st.session_state.habit_series
 
-        # Collect the hours and minutes from the user
-        c1, c2, c3, c4 = duration_form.columns([5,1,5,1])
-        with c1:
-            st.number_input(gt('misc.hours', Lang.lang), min_value=0,
-                            max_value=23, value=0, step=1, format='%d',
-                            key='new_duration_hours')
-        with c3:
-            st.number_input(gt('misc.minutes', Lang.lang), min_value=0,
-                            max_value=59, value=0, step=1, format='%d',
-                            key='new_duration_minutes')
-
-        def record_and_advance():
-            # Convert the user's input into a DataFrame
-            new_duration = dt.timedelta(
-                hours=st.session_state.new_duration_hours,
-                minutes=st.session_state.new_duration_minutes
-                )
-            new_row = pd.DataFrame({'date': [st.session_state.date_cursor],
-                                    'duration': [new_duration]})
-            new_row['date'] = pd.to_datetime(new_row['date'])
-            # Save the data to the session_state DataFrame
-            st.session_state.update_data_df = pd.concat(
-                [st.session_state.update_data_df, new_row],
-                ignore_index=True,
-                )
-            # Increment the date cursor
-            st.session_state.date_cursor += dt.timedelta(days=1)
+@st.fragment
+def backfill() -> None:
+    """Prompt the user to enter the missing days and show the data as 
+    it's being updated. Saving a day only reruns this part of the page 
+    until the data is up to date, then the whole page is redrawn to 
+    show the insights.
+    """
+    today = dt.datetime.today().date()
+    if st.session_state.date_cursor > today:
+        st.rerun()
 
-        duration_form.form_submit_button(gt('update.save', Lang.lang),
-                                         on_click=record_and_advance)
+    st.write(gt('update.not_up2date', Lang.lang))
 
-        # Show the latest data as it is being updated
-        if len(st.session_state.update_data_df) > 0:
-            st.divider()
-            reversed_df = st.session_state.update_data_df.iloc[::-1]
-            st.dataframe(localize_df_data(reversed_df, Lang.lang),
-                         use_container_width=True)
+    # Enter longer gaps all at once in a grid instead of one day 
+    # (and one rerun) at a time
+    days_missing = (today - st.session_state.date_cursor).days + 1
+    if days_missing >= Backfill.bulk_min_days:
+        bulk_backfill(today)
+    else:
+        single_day_backfill()
 
-        # Return a valid value to the caller function with every rerun 
-        # of the page
-        return st.session_state.update_data_df
+    # Show the latest data as it is being updated
+    if len(st.session_state.habit_series) > 0:
+        st.divider()
+        show_table(st.session_state.habit_series, key='updating',
+                   newest_first=True)
 
-def up_to_date_download(df: pd.DataFrame) -> None:
-    """Display the updated status of the data.
-    Format the DataFrame and create a CSV file.
-    Display an interface to download the file.
-    """
-    # Copy the DataFrame and remove '0 days' from the 'duration' values
-    remove_days = df.copy()
-    def format_timedelta(td):
-        return f'{td.components.hours:02}:{td.components.minutes:02}:{td.components.seconds:02}'
-    remove_days['duration'] = (remove_days['duration']
-                                .apply(format_timedelta))
-    
-    # Create a CSV file with the formatted data 
-    csv = remove_days.to_csv(index=False)
+def append_days(days, seconds) -> None:
+    """Append newly recorded days to the session_state data, running 
+    totals, and milestone index, and move the date cursor to the day 
+    after the last one.
+    Habits stored on the server also have just the new days written.
+    """
+    series = st.session_state.habit_series.append(days, seconds)
+    new_seconds = series.seconds[-len(days):]
+    for day_seconds in new_seconds.tolist():
+        st.session_state.update_data_aggregates.append(day_seconds)
+    st.session_state.update_data_milestones.append(series.days[-len(days):],
+                                                   new_seconds)
+    if 'store_habit_id' in st.session_state:
+        store.upsert_days(st.session_state.store_habit_id,
+                          series.days[-len(days):], new_seconds)
+    st.session_state.habit_series = series
+    st.session_state.date_cursor = series.last_date + dt.timedelta(days=1)
+
+    # The habit is also replaced in its multi-habit file
+    if 'habit_set' in st.session_state:
+        st.session_state.habit_set = st.session_state.habit_set.replace(
+            st.session_state.loaded_habit, series)
+
+def single_day_backfill() -> None:
+    """Prompt the user to enter the duration for the day at the date 
+    cursor, then advance to the next day.
+    """
+    # Define the form container and write the date in question
+    duration_form = st.form('duration_form')
+    formatted_date = date_to_localized_string(st.session_state.date_cursor)
+    duration_form.write(gt('update.enter', Lang.lang).format(formatted_date))
+
+    # Collect the hours and minutes from the user
+    c1, c2, c3, c4 = duration_form.columns([5,1,5,1])
+    with c1:
+        st.number_input(gt('misc.hours', Lang.lang), min_value=0,
+                        max_value=23, value=0, step=1, format='%d',
+                        key='new_duration_hours')
+    with c3:
+        st.number_input(gt('misc.minutes', Lang.lang), min_value=0,
+                        max_value=59, value=0, step=1, format='%d',
+                        key='new_duration_minutes')
+
+    def record_and_advance():
+        # Save the user's input to the session_state DataFrame and 
+        # running totals, and increment the date cursor
+        new_duration = (st.session_state.new_duration_hours * 3600
+                        + st.session_state.new_duration_minutes * 60)
+        append_days([codec.date_to_day(st.session_state.date_cursor)],
+                    [new_duration])
 
+    duration_form.form_submit_button(gt('update.save', Lang.lang),
+                                     on_click=record_and_advance)
+
+def bulk_backfill(today: dt.date) -> None:
+    """Prompt the user to enter the durations for every day from the 
+    date cursor up to today in an editable grid prefilled with zeros, 
+    then record them all at once.
+    """
+    days = np.arange(codec.date_to_day(st.session_state.date_cursor),
+                     codec.date_to_day(today) + 1, dtype=np.int32)
+    date_label = gt('misc.date', Lang.lang)
+    hours_label = gt('misc.hours', Lang.lang)
+    minutes_label = gt('misc.minutes', Lang.lang)
+    grid = pd.DataFrame({
+        date_label: [date_to_localized_string(codec.day_to_date(day))
+                     for day in days],
+        hours_label: np.zeros(len(days), dtype=int),
+        minutes_label: np.zeros(len(days), dtype=int),
+        })
+
+    with st.form('bulk_form'):
+        st.write(gt('update.enter_bulk', Lang.lang).format(len(days)))
+        edited = st.data_editor(
+            grid,
+            hide_index=True,
+            use_container_width=True,
+            disabled=[date_label],
+            column_config={
+                hours_label: st.column_config.NumberColumn(
+                    min_value=0, max_value=23, step=1, format='%d'),
+                minutes_label: st.column_config.NumberColumn(
+                    min_value=0, max_value=59, step=1, format='%d'),
+                },
+            key='bulk_grid',
+            )
+        submitted = st.form_submit_button(gt('update.save', Lang.lang))
+
+    if submitted:
+        # Convert the whole grid to seconds at once, treating any 
+        # cleared cells as zero
+        hours = edited[hours_label].fillna(0).clip(0, 23).to_numpy(int)
+        minutes = edited[minutes_label].fillna(0).clip(0, 59).to_numpy(int)
+        append_days(days, hours * 3600 + minutes * 60)
+        st.rerun()
+
+def build_download(
+        df: pd.DataFrame,
+        file_format: str,
+        metadata: dict,
+        ) -> bytes:
+    """Create the contents of a downloadable file in the given format.
+    Parquet and Feather files also store the metadata (habit name and 
+    goal, or file name and goals); CSV files only contain the habits, 
+    dates, and durations.
+    """
+    with metrics.stage('build_download', rows=len(df)):
+        if file_format in ('Parquet', 'Feather'):
+            # pyarrow is only imported once a binary format is chosen
+            import scripts.arrow_io as arrow_io
+            if file_format == 'Parquet':
+                return arrow_io.to_parquet_bytes(df, metadata)
+            return arrow_io.to_feather_bytes(df, metadata)
+
+        # Format the dates as 'YYYY-MM-DD' and durations as 'HH:MM:SS'
+        csv_df = pd.DataFrame({
+            'date': codec.format_dates(df['date']),
+            'duration': codec.format_durations(df['duration']),
+            })
+        if 'habit' in df.columns:
+            csv_df.insert(0, 'habit', df['habit'].to_numpy())
+        return csv_df.to_csv(index=False).encode()
+
+@st.fragment
+def up_to_date_download(
+        series: HabitSeries,
+        habit_set: HabitSet | None = None,
+        ) -> None:
+    """Display the updated status of the data.
+    Display an interface to name the file and choose its format, and 
+    to download it. Typing a name or choosing a format only reruns this 
+    part of the page. For a habit of a multi-habit file, the download 
+    contains every habit in the set.
+    """
     # Display the up-to-date status of the data
     c1, c2 = st.columns(2)
     with c1:
-        earliest_date = date_to_localized_string(df['date'].iloc[0].date())
-        latest_date = date_to_localized_string(df['date'].iloc[-1].date())
+        earliest_date = date_to_localized_string(series.first_date)
+        latest_date = date_to_localized_string(series.last_date)
         st.write(gt('download.up2date', Lang.lang))
         if earliest_date == latest_date:
             st.write(latest_date)
@@ -134,15 +498,93 @@ def up_to_date_download(df: pd.DataFrame) -> None:
                 earliest_date, latest_date,
                 ))
 
-    # Display a basic interface to download the CSV file 
+    # Display a basic interface to download the file. The name is kept 
+    # in session_state so that an uploaded file can restore it.
+    if 'download_filename' not in st.session_state:
+        st.session_state.download_filename = 'tracked_habit'
     with c2:
         c1, c2 = st.columns(2)
         with c1:
-            download_filename = st.text_input(gt('download.name', Lang.lang),
-                                              value='tracked_habit')
-            download_filename = download_filename.replace(' ', '_') + '.csv'
-            st.download_button(label=gt('download.download', Lang.lang),
-                               data=csv, file_name=download_filename,
-                               mime='text/csv')
+            habit_name = st.text_input(gt('download.name', Lang.lang),
+                                       key='download_filename')
+            file_format = st.radio(gt('download.format', Lang.lang),
+                                   tuple(download_formats), horizontal=True)
+            extension, mime = download_formats[file_format]
+            download_filename = habit_name.replace(' ', '_') + '.' + extension
+
+            # Only create the file again when the data, name, goal, or 
+            # format changes
+            goal = st.session_state.get('user_goal', 10000)
+            st.session_state.download_goal = goal
+            if habit_set is None:
+                metadata = {'habit': habit_name, 'goal': goal}
+                data = series
+            else:
+                metadata = {'name': habit_name, 'goals': habit_goals()}
+                data = habit_set
+            key = ('download', data.hash, file_format, habit_name,
+                   json.dumps(metadata, sort_keys=True))
+            file_data = get_or_compute(
+                key,
+                lambda: build_download(data.frame(), file_format, metadata),
+                )
+
+            st.download_button(
+                label=gt('download.download', Lang.lang).format(extension),
+                data=file_data, file_name=download_filename, mime=mime,
+                )
         with c2:
-            st.write(gt('download.unfortunately', Lang.lang))
+            # Only single habits can be saved on the server so far
+            if not store.enabled():
+                st.write(gt('download.unfortunately', Lang.lang))
+            elif habit_set is None:
+                save_to_store(series, habit_name, goal)
+
+def store_owner() -> str:
+    """Return the key the visitor's habits are stored on the server 
+    under, making a new one on their first visit. It's kept in the 
+    page's link rather than session_state, which is cleared whenever a 
+    file is uploaded, so bookmarking the page keeps the habits.
+    """
+    owner = st.query_params.get('owner')
+    if not owner:
+        owner = store.new_owner()
+        st.query_params['owner'] = owner
+    return owner
+
+def save_to_store(series: HabitSeries, habit_name: str, goal: int) -> None:
+    """Display a button to save the habit on the server under the 
+    visitor's key. Once it's saved, newly recorded days are written as 
+    they're entered.
+    """
+    if st.button(gt('store.save', Lang.lang)):
+        habit_id, stored_name = store.save_habit(
+            store_owner(), habit_name, goal,
+            st.session_state.get('store_habit_id'))
+        store.upsert_days(habit_id, series.days, series.seconds)
+        st.session_state.store_habit_id = habit_id
+        st.success(gt('store.saved', Lang.lang).format(len(series),
+                                                       stored_name))
+    if 'store_habit_id' in st.session_state:
+        st.write(gt('store.auto', Lang.lang))
+        st.write(gt('store.bookmark', Lang.lang))
+
+def load_from_store(habit_name: str) -> None:
+    """Load a habit the visitor saved on the server into session_state 
+    in the same way as an uploaded file.
+    """
+    stored = store.habit(store_owner(), habit_name)
+    if stored is None:
+        # Another session may have deleted it since the list was shown
+        raise ValueError(f'No stored habit named {habit_name}')
+    habit_id, goal = stored
+    with metrics.stage('store_load') as measured:
+        series = store.load_series(habit_id)
+        measured['rows'] = len(series)
+    if len(series) == 0:
+        raise ValueError('No recorded days')
+    st.session_state.habit_series = series
+    st.session_state.tracking_bad_lines = []
+    st.session_state.store_habit_id = habit_id
+    st.session_state.download_filename = habit_name
+    st.session_state.user_goal = goal
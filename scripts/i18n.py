@@ -2,110 +2,120 @@ import json
 import copy
 import datetime as dt
 from pathlib import Path
-
-import pandas as pd
-import matplotlib.dates as mdates
+from functools import cache
+from typing import TYPE_CHECKING
 
 from config import Lang
 
+if TYPE_CHECKING:
+    import matplotlib.dates as mdates
+
 
 file_path = Path(__file__).parents[1] / 'translations.json'
-with open(file_path, 'r') as tr:
-    translations = json.load(tr)
+
+@cache
+def catalog() -> dict[tuple[str, str], str]:
+    """Load the translations once per process, flattened so that each 
+    text is found with a single lookup of (language, 'key1.key2').
+    """
+    with open(file_path, 'r') as tr:
+        translations = json.load(tr)
+    return {(language, f'{key1}.{key2}'): text
+            for language, sections in translations.items()
+            for key1, texts in sections.items()
+            for key2, text in texts.items()}
 
 def get_translation(key_path: str, language: str = 'en-US') -> str:
     """Get the translation for the given key path in the given language"""
-    key1, key2 = key_path.split('.')
-    # Use an empty dictionary if the language or outer key does not exist. 
-    # Return the inner key itself if the language or a key does not exist.
-    return translations.get(language, {}).get(key1, {}).get(key2, key2)
+    text = catalog().get((language, key_path))
+    if text is None:
+        # Return the inner key itself if the language or a key does not 
+        # exist.
+        return key_path.split('.')[-1]
+    return text
 
 def test_name_to_japanese(test_name: str) -> str:
     """Convert the name of a set of test data to Japanese"""
     return (test_name.replace('-day test data', '日間のテストデータ')
             .replace(' with short durations', '（割と短い時間）'))
 
-def localize_ConciseDateFormatter(
-        arg_CDF: mdates.ConciseDateFormatter,
-        lang: str = 'en-US',
-        ) -> mdates.ConciseDateFormatter:
-    """Format a ConciseDateFormatter based on localized formatting.
-    Currently only US English ('en-US') or Japanese ('ja').
-    """
-
-    ret_CDF = copy.copy(arg_CDF)
-
-    if lang == 'en-US':
+# Date formats for the tick labels of graphs in each language, in the 
+# form of matplotlib's ConciseDateFormatter. Each list is indexed by 
+# the level of the ticks: years, months, days, hours, minutes, seconds.
+concise_date_formats = {
+    'en-US': {
         # Set date formatting
-        ret_CDF.formats = ['%Y', '%b', '%e', # format yr/mo/day
-                           '%H:%M', '%H:%M', '%S.%f'] # not using hr/min/sec
-        
+        'formats': ['%Y', '%b', '%e', # format yr/mo/day
+                    '%H:%M', '%H:%M', '%S.%f'], # not using hr/min/sec
         # Set "zeros" to mostly the same formatting except for the 
         # beginning of the month amongst ticks of mostly days and the 
         # beginning of the year amongst ticks of mostly months
-        ret_CDF.zero_formats = [''] + ret_CDF.formats[:-1]
-        ret_CDF.zero_formats[2] = '%b %e'
-        ret_CDF.zero_formats[1] = "%b '%y"
-
+        'zero_formats': ['', "%b '%y", '%b %e',
+                         '%e', '%H:%M', '%H:%M'],
         # Make the "offset" string at the right of the axis in the 
         # standard order for US English 
-        ret_CDF.offset_formats = ['', '%Y', '%B %Y', '%B %e, %Y',
-                                    '%B %e, %Y', '%B %e, %Y %H:%M']
-    
-    elif lang == 'ja':
+        'offset_formats': ['', '%Y', '%B %Y', '%B %e, %Y',
+                           '%B %e, %Y', '%B %e, %Y %H:%M'],
+        },
+    'ja': {
         # Change date formatting to Japanese
-        ret_CDF.formats = ['%y年', '%-m月', '%e日', # format yr/mo/day
-                           '%H:%M', '%H:%M', '%S.%f'] # not using hr/min/sec
-        
+        'formats': ['%y年', '%-m月', '%e日', # format yr/mo/day
+                    '%H:%M', '%H:%M', '%S.%f'], # not using hr/min/sec
         # Set "zeros" to mostly the same formatting except for the 
         # beginning of the month amongst ticks of mostly days and the 
         # beginning of the year amongst ticks of mostly months
-        ret_CDF.zero_formats = [''] + ret_CDF.formats[:-1]
-        ret_CDF.zero_formats[2] = '%-m月%e日'
-        ret_CDF.zero_formats[1] = '%y年%-m月'
-
+        'zero_formats': ['', '%y年%-m月', '%-m月%e日',
+                         '%e日', '%H:%M', '%H:%M'],
         # Make the "offset" string at the right of the axis have
         # Japanese formatting
-        ret_CDF.offset_formats = ['', '%Y年', '%Y年%-m月', '%Y年%-m月%e日',
-                                    '%Y年%-m月%e日', '%Y年%-m月%e日 %H:%M']
-    
+        'offset_formats': ['', '%Y年', '%Y年%-m月', '%Y年%-m月%e日',
+                           '%Y年%-m月%e日', '%Y年%-m月%e日 %H:%M'],
+        },
+}
+
+def localize_ConciseDateFormatter(
+        arg_CDF: 'mdates.ConciseDateFormatter',
+        lang: str = 'en-US',
+        ) -> 'mdates.ConciseDateFormatter':
+    """Format a ConciseDateFormatter based on localized formatting.
+    Currently only US English ('en-US') or Japanese ('ja').
+    """
+
+    ret_CDF = copy.copy(arg_CDF)
+    if lang in concise_date_formats:
+        for attribute, formats in concise_date_formats[lang].items():
+            setattr(ret_CDF, attribute, list(formats))
     return ret_CDF
 
+def vega_time_format(lang: str = 'en-US') -> dict[str, str]:
+    """Convert the concise date formats of the language to a Vega time 
+    multi-format, which labels each tick with the format of the largest 
+    unit it falls at the start of. There's no offset string in Vega, so 
+    days are labeled with their month like ticks at the start of one.
+    """
+    formats = concise_date_formats.get(lang, concise_date_formats['en-US'])
+    years, months, days, hours, minutes, seconds = formats['formats']
+    return {
+        'year': years,
+        'quarter': months,
+        'month': months,
+        'week': formats['zero_formats'][2],
+        'date': formats['zero_formats'][2],
+        'hours': hours,
+        'minutes': minutes,
+        'seconds': seconds,
+        'milliseconds': seconds,
+    }
+
+# Suffixes added to Japanese dates, indexed by date.weekday()
+ja_days_of_the_week = ('（月）', '（火）', '（水）', '（木）',
+                       '（金）', '（土）', '（日）')
+
 def date_to_localized_string(date: dt.date) -> str:
     """Format a date object into a human-readable string based on the 
     user's language.
     """
     datestr = date.strftime(get_translation('misc.date_format', Lang.lang))
-    ja_days_of_the_week = ['（月）', '（火）', '（水）', '（木）',
-                           '（金）', '（土）', '（日）']
     if Lang.lang == 'ja':
         datestr += ja_days_of_the_week[date.weekday()]
     return datestr
-
-def localize_df_data(df: pd.DataFrame, lang: str = 'en-US') -> pd.DataFrame:
-    """Format a DataFrame using human-readable dates and durations 
-    based on the user's language. 
-    Currently only US English ('en-US') or Japanese ('ja').
-    """
-    format_df = df.copy()
-
-    # Change the date column to a readable format for the locale 
-    format_df['date'] = format_df['date'].map(date_to_localized_string)
-    if lang == 'ja':
-        format_df = format_df.rename(columns={'date': '日付'})
-
-    # Show in minutes if the max is 2 hours or under, otherwise show in 
-    # hours
-    format_df['duration'] = format_df['duration'].dt.total_seconds() / 60
-    if max(format_df['duration']) <= 120:
-        format_df = format_df.rename(
-            columns={'duration': get_translation('misc.minutes', Lang.lang)}
-            )
-    else:
-        format_df['duration'] = format_df['duration'] / 60
-        format_df['duration'] = format_df['duration'].round(1)
-        format_df = format_df.rename(
-            columns={'duration': get_translation('misc.hours', Lang.lang)}
-            )
-    
-    return format_df
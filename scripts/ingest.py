@@ -0,0 +1,239 @@
+import csv
+from pathlib import Path
+from typing import BinaryIO
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+import scripts.codec as codec
+import scripts.arrow_io as arrow_io
+from config import Ingest
+
+
+# Read every column as plain strings rather than inferring their types,
+# since the codec parses and validates them itself. Files of several 
+# habits also have a 'habit' column of their names.
+_schema = {'date': pa.string(), 'duration': pa.string()}
+_habit_schema = {'habit': pa.string(), **_schema}
+
+def _csv_columns(file: BinaryIO) -> list[str]:
+    """Read the column names in the header of a CSV file, leaving the 
+    file where it was.
+    """
+    start = file.tell()
+    header = file.readline().decode('utf-8-sig', errors='replace')
+    file.seek(start)
+    return next(csv.reader([header]), [])
+
+def _habit_codes(names: pa.Array, habits: dict[str, int]) -> np.ndarray:
+    """Convert a chunk of habit names to int codes, adding new names to 
+    habits in the order they're first seen. Missing names are -1.
+    """
+    encoded = names.dictionary_encode()
+    lookup = np.array(
+        [habits.setdefault(name, len(habits)) if name else -1
+         for name in encoded.dictionary.to_pylist()] + [-1],
+        dtype=np.int32)
+    # Missing names point past the end of the dictionary, to the -1
+    indices = encoded.indices.fill_null(len(encoded.dictionary))
+    return lookup[indices.to_numpy(zero_copy_only=False)]
+
+def _line_numbers(rows: np.ndarray, skipped_lines: list[int]) -> list[int]:
+    """Convert the indices of rows read from a CSV file to their line 
+    numbers, which start at 1 and include the header, given the line 
+    numbers of the rows the reader skipped. Return them together with 
+    the skipped lines in order.
+    """
+    skipped = np.sort(np.asarray(skipped_lines, dtype=np.int64))
+    # Number of rows read before each skipped line
+    rows_before = skipped - 2 - np.arange(len(skipped))
+    lines = (rows.astype(np.int64) + 2
+             + np.searchsorted(rows_before, rows, side='right'))
+    return np.sort(np.r_[lines, skipped]).tolist()
+
+def read_habit_csv(file: BinaryIO) -> tuple[pd.DataFrame, list[int]]:
+    """Read a CSV file of dates and durations in chunks, validating
+    each chunk as it is read so that only the parsed int32 columns are
+    kept in memory.
+    Return a compact DataFrame sorted by date with duplicate dates
+    merged, along with the line numbers of any rows that couldn't be
+    read, including rows with the wrong number of fields. Blank lines 
+    are skipped. A file with a 'habit' column is returned as a compact 
+    DataFrame of several habits (see codec.make_habit_frame), sorted 
+    by habit and then date.
+    """
+    schema = _habit_schema if 'habit' in _csv_columns(file) else _schema
+
+    # Rows with the wrong number of fields are left out of the batches, 
+    # so their line numbers are kept to find the line of every other row
+    skipped_lines = []
+    def skip_invalid_row(row: pa_csv.InvalidRow) -> str:
+        skipped_lines.append(row.number)
+        return 'skip'
+
+    try:
+        reader = pa_csv.open_csv(
+            file,
+            read_options=pa_csv.ReadOptions(block_size=Ingest.chunk_bytes),
+            # Blank lines are read as rows of empty fields rather than 
+            # dropped, so that they still count toward the line numbers
+            parse_options=pa_csv.ParseOptions(
+                invalid_row_handler=skip_invalid_row,
+                ignore_empty_lines=False,
+                ),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=schema,
+                include_columns=list(schema),
+                ),
+            )
+    except KeyError as e:
+        # Report a missing column the same way as any other bad file
+        raise ValueError(str(e)) from e
+
+    day_chunks, second_chunks, code_chunks, bad_rows = [], [], [], []
+    habits = {}
+    rows_read = 0
+    for batch in reader:
+        days, days_valid = codec.try_parse_dates(
+            batch.column('date').to_numpy(zero_copy_only=False))
+        seconds, seconds_valid = codec.try_parse_durations(
+            batch.column('duration').to_numpy(zero_copy_only=False))
+
+        # A day can't have a negative duration or more than 24 hours
+        valid = (days_valid & seconds_valid
+                 & (seconds >= 0) & (seconds <= codec.max_seconds))
+        if schema is _habit_schema:
+            codes = _habit_codes(batch.column('habit'), habits)
+            valid &= codes >= 0
+            code_chunks.append(codes[valid])
+
+        # Blank lines are invalid too, but aren't reported
+        bad = np.flatnonzero(~valid)
+        blank = np.ones(len(bad), dtype=bool)
+        for column in schema:
+            blank &= (batch.column(column).take(bad)
+                      .to_numpy(zero_copy_only=False) == '')
+        bad_rows.append(bad[~blank] + rows_read)
+        day_chunks.append(days[valid])
+        second_chunks.append(seconds[valid])
+        rows_read += batch.num_rows
+    bad_lines = _line_numbers(np.concatenate(bad_rows or [[]]), skipped_lines)
+
+    if schema is _habit_schema:
+        if not day_chunks:
+            return codec.make_habit_frame([], [], [], []), bad_lines
+        codes, days, seconds = codec.merge_habit_dates(
+            np.concatenate(code_chunks), np.concatenate(day_chunks),
+            np.concatenate(second_chunks))
+        return codec.make_habit_frame(habits, codes, days, seconds), bad_lines
+    if not day_chunks:
+        return codec.make_frame([], []), bad_lines
+    return (codec.merge_dates(np.concatenate(day_chunks),
+                              np.concatenate(second_chunks)),
+            bad_lines)
+
+def read_habit_file(file: BinaryIO) -> tuple[pd.DataFrame, list[int], dict]:
+    """Read an uploaded CSV, Parquet, or Feather file depending on its
+    extension.
+    Return a compact DataFrame (of one habit or several), the line 
+    numbers of any CSV rows (or row numbers of any Parquet or Feather 
+    rows) that couldn't be read, and the metadata (habit name and goal, 
+    or file name and goals) saved in a Parquet or Feather file.
+    """
+    name = getattr(file, 'name', '').lower()
+    if name.endswith('.parquet'):
+        return arrow_io.read_habit_parquet(file)
+    if name.endswith('.feather'):
+        return arrow_io.read_habit_feather(file)
+    df, bad_lines = read_habit_csv(file)
+    return df, bad_lines, {}
+
+def read_habit_files(
+        files: list[BinaryIO],
+        policy: str = Ingest.duplicate_policy,
+        ) -> tuple[pd.DataFrame, list[int] | list[str], dict]:
+    """Read several uploaded files at once in a thread pool and merge 
+    them into one compact DataFrame with a single sort. Days recorded 
+    in more than one file are combined by the policy (see 
+    codec.resolve_duplicates), where the file with the most recent last 
+    day is the latest.
+    Single-habit files are only merged into one habit if the habit 
+    names saved in them agree (CSV files don't have one). If any file 
+    has several habits, or the names differ, the result has several 
+    habits, with each single-habit file's habit named by the name saved 
+    in it or else by the file's name.
+    Return the DataFrame, the line numbers of any CSV rows that couldn't 
+    be read (as '<file name> <line>' strings when there are several 
+    files), and the merged metadata, with the latest file's taking 
+    precedence.
+    """
+    if len(files) == 1:
+        df, bad_lines, metadata = read_habit_file(files[0])
+        return df, bad_lines, metadata
+
+    # pyarrow releases the GIL while parsing, so the files are read in 
+    # parallel
+    with ThreadPoolExecutor(max_workers=Ingest.max_workers) as pool:
+        results = list(pool.map(read_habit_file, files))
+    names = [getattr(file, 'name', f'file_{i + 1}')
+             for i, file in enumerate(files)]
+    bad_lines = [f'{name} {line}' for name, (_, lines, _) in zip(names, results)
+                 for line in lines]
+
+    # Rank the files by their last recorded day, breaking ties by the 
+    # order they were uploaded in
+    frames = [df for df, _, _ in results]
+    last_days = [df['date'].iloc[-1] if len(df) else -2**31 for df in frames]
+    order = sorted(range(len(frames)), key=lambda i: (last_days[i], i))
+    file_ranks = np.empty(len(frames), dtype=np.int32)
+    file_ranks[order] = np.arange(len(frames))
+
+    # Give every row the code of its habit in the combined list of 
+    # names. A single-habit file's habit is named by the name saved in 
+    # it, or else by the file's name.
+    saved_names = {results[i][2]['habit'] for i, df in enumerate(frames)
+                   if 'habit' not in df.columns and 'habit' in results[i][2]}
+    multi_habit = (any('habit' in df.columns for df in frames)
+                   or len(saved_names) > 1)
+    single_names = [results[i][2].get('habit', Path(name).stem)
+                    for i, name in enumerate(names)]
+    habits = {}
+    code_chunks = []
+    for df, single_name in zip(frames, single_names):
+        if 'habit' in df.columns:
+            lookup = np.array(
+                [habits.setdefault(str(habit), len(habits))
+                 for habit in df['habit'].cat.categories], dtype=np.int32)
+            code_chunks.append(lookup[df['habit'].cat.codes.to_numpy()])
+        else:
+            code = habits.setdefault(single_name if multi_habit else '',
+                                     len(habits))
+            code_chunks.append(np.full(len(df), code, dtype=np.int32))
+
+    codes, days, seconds = codec.resolve_duplicates(
+        np.concatenate(code_chunks),
+        np.concatenate([df['date'].to_numpy() for df in frames]),
+        np.concatenate([df['duration'].to_numpy() for df in frames]),
+        np.repeat(file_ranks, [len(df) for df in frames]),
+        policy,
+        )
+
+    metadata = {}
+    for i in order:
+        metadata.update(results[i][2])
+    if multi_habit:
+        goals = {}
+        for i in order:
+            goals.update(results[i][2].get('goals', {}))
+            if 'goal' in results[i][2] and 'habit' not in frames[i].columns:
+                goals[single_names[i]] = results[i][2]['goal']
+        metadata = {key: value for key, value in metadata.items()
+                    if key not in ('habit', 'goal')}
+        metadata['goals'] = goals
+        return (codec.make_habit_frame(habits, codes, days, seconds),
+                bad_lines, metadata)
+    return codec.make_frame(days, seconds), bad_lines, metadata
+
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+import scripts.codec as codec
+from scripts.i18n import get_translation, ja_days_of_the_week
+
+
+# The same suffixes as an array so they can be gathered all at once
+ja_weekday_suffixes = np.array(ja_days_of_the_week)
+
+def localize_dates(days: np.ndarray, lang: str = 'en-US') -> np.ndarray:
+    """Format int days since the epoch into human-readable strings based 
+    on the user's language, all at once.
+    """
+    datestrs = (codec.to_datetimes(days)
+                .strftime(get_translation('misc.date_format', lang))
+                .to_numpy(dtype=str))
+    if lang == 'ja':
+        # 1970-01-01 was a Thursday, which has a weekday() of 3
+        weekdays = (np.asarray(days, dtype=np.int64) + 3) % 7
+        datestrs = np.char.add(datestrs, ja_weekday_suffixes[weekdays])
+    return datestrs
+
+def localize_df_data(df: pd.DataFrame, lang: str = 'en-US') -> pd.DataFrame:
+    """Format a DataFrame using human-readable dates and durations 
+    based on the user's language. 
+    Currently only US English ('en-US') or Japanese ('ja').
+    """
+    # Change the date column to a readable format for the locale and 
+    # convert the durations to minutes
+    format_df = pd.DataFrame({
+        'date': localize_dates(df['date'].to_numpy(), lang),
+        'duration': df['duration'].to_numpy() / 60,
+        }, index=df.index)
+    if lang == 'ja':
+        format_df = format_df.rename(columns={'date': '日付'})
+
+    # Show in minutes if the max is 2 hours or under, otherwise show in 
+    # hours
+    if format_df['duration'].max() <= 120:
+        format_df = format_df.rename(
+            columns={'duration': get_translation('misc.minutes', lang)}
+            )
+    else:
+        format_df['duration'] = format_df['duration'] / 60
+        format_df['duration'] = format_df['duration'].round(1)
+        format_df = format_df.rename(
+            columns={'duration': get_translation('misc.hours', lang)}
+            )
+    
+    return format_df
@@ -1,14 +1,20 @@
 import os
 import datetime as dt
-from glob import glob
 
 import streamlit as st
 import pandas as pd
 
+import scripts.codec as codec
+from scripts.series import HabitSeries, HabitSet
+import scripts.store as store
+import scripts.metrics as metrics
 from scripts.helpers import show_all_data_info, update_data, up_to_date_download
+from scripts.helpers import load_from_store, select_habit, show_habit_overview
+from scripts.helpers import store_owner
 from scripts.i18n import get_translation as gt
 from scripts.i18n import test_name_to_japanese
-from config import Lang
+from scripts.registry import test_datasets, load_test_dataset
+from config import Lang, Ingest
 
 
 def new_habit() -> None:
@@ -37,19 +43,23 @@ def new_habit() -> None:
     # Prompt the user to enter data for today
     if st.session_state.starting_new:
         today = dt.datetime.today().date()
-        empty_df = pd.DataFrame(columns=['date', 'duration'])
-        new_df = update_data(empty_df, today)
+        new_series = update_data(HabitSeries(), today)
 
         # Display a download option and data insights
-        if len(new_df) > 0:
-            up_to_date_download(new_df)
+        if len(new_series) > 0:
+            up_to_date_download(new_series)
             st.divider()
-            show_all_data_info(new_df)
+            show_all_data_info(new_series,
+                               st.session_state.update_data_aggregates,
+                               st.session_state.update_data_milestones)
 
 def track_habit() -> None:
-    """Prompt the user to upload a CSV file previously created with 
-    this site and update the duration data up to and including today.
-    Display data insights and a download option.
+    """Prompt the user to upload one or more CSV, Parquet, or Feather 
+    files previously created with this site and update the duration
+    data up to and including today.
+    Display data insights and a download option. Files of several 
+    habits show an overview of all of them, and one habit at a time is 
+    updated and shown in detail.
     """
     # Show a basic file upload interface
     c1, c2 = st.columns([1,2])
@@ -57,47 +67,121 @@ def track_habit() -> None:
         st.write(gt('menu.track', Lang.lang))
         st.write(gt('menu.nice2CU', Lang.lang))
     with c2:
-        uploaded_file = st.file_uploader(
+        uploaded_files = st.file_uploader(
             gt('menu.uploadCSV', Lang.lang), 
-            type='csv',
+            type=['csv', 'parquet', 'feather'],
+            accept_multiple_files=True,
             on_change=lambda: st.session_state.clear()
             )
+
+        # Ask how to combine days found in more than one of the files
+        policy = Ingest.duplicate_policy
+        if len(uploaded_files) > 1:
+            labels = {p: gt(f'menu.duplicates_{p}', Lang.lang)
+                      for p in codec.duplicate_policies}
+            policy = st.radio(
+                gt('menu.duplicates', Lang.lang),
+                codec.duplicate_policies,
+                index=codec.duplicate_policies.index(policy),
+                format_func=labels.get,
+                horizontal=True,
+                on_change=lambda: st.session_state.clear()
+                )
+
+        # Habits the visitor saved can also be continued from the server 
+        # if it keeps them
+        stored_habit = None
+        if store.enabled():
+            stored_habit = st.selectbox(
+                gt('store.load', Lang.lang),
+                [gt('menu.choose', Lang.lang)]
+                + store.habit_names(store_owner()),
+                on_change=lambda: st.session_state.clear()
+                )
+            if stored_habit == gt('menu.choose', Lang.lang):
+                stored_habit = None
     
     st.divider()
 
-    # Read in the user's CSV file
-    if uploaded_file is not None:
+    # Read in the user's files or the stored habit
+    if uploaded_files or stored_habit is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            
-            # Initialize session_state variables 
-            if 'tracking_df' not in st.session_state:
-                st.session_state.tracking_df = df.copy()
-
-            # Ensure 'date' has datetime objects and 'duration' has 
-            # timedelta objects
-            st.session_state.tracking_df['date'] = (
-                pd.to_datetime(st.session_state.tracking_df['date'])
-                )
-            st.session_state.tracking_df['duration'] = (
-                pd.to_timedelta(st.session_state.tracking_df['duration'])
-                )
+            # Initialize session_state variables, parsing the file only 
+            # once per upload and storing the dates and durations as 
+            # int32 days and seconds sorted by date. The series is the 
+            # only copy of the data kept in the session.
+            loaded = ('habit_series' in st.session_state
+                      or 'habit_set' in st.session_state)
+            if not loaded and not uploaded_files:
+                load_from_store(stored_habit)
+            elif not loaded:
+                # pyarrow is only imported once a file is uploaded. 
+                # Several files are read at once and merged into one.
+                from scripts.ingest import read_habit_files
+                with metrics.stage('read_upload') as measured:
+                    df, bad_lines, metadata = read_habit_files(
+                        uploaded_files, policy)
+                    measured['rows'] = len(df)
+                if len(df) == 0:
+                    raise ValueError('No valid rows')
+                st.session_state.tracking_bad_lines = bad_lines
+
+                if 'habit' in df.columns:
+                    # Each habit of the file gets its own series, and 
+                    # the chosen one is loaded by select_habit
+                    st.session_state.habit_set = HabitSet.from_frame(df)
+                    st.session_state.habit_goals = {
+                        name: int(goal)
+                        for name, goal in metadata.get('goals', {}).items()}
+                    if 'name' in metadata:
+                        st.session_state.download_filename = metadata['name']
+                else:
+                    st.session_state.habit_series = HabitSeries(
+                        df['date'], df['duration'])
+
+                    # Restore the habit name and goal saved with the data
+                    if 'habit' in metadata:
+                        st.session_state.download_filename = metadata['habit']
+                    if 'goal' in metadata:
+                        st.session_state.user_goal = int(metadata['goal'])
+
+            # Let the user know about any rows that had to be skipped
+            bad_lines = st.session_state.tracking_bad_lines
+            if bad_lines:
+                shown = bad_lines[:Ingest.max_bad_lines_shown]
+                st.warning(gt('menu.bad_rows', Lang.lang).format(
+                    ', '.join(map(str, shown))
+                    + (', ...' if len(bad_lines) > len(shown) else '')
+                    ))
+
+            # Show every habit of a multi-habit file and let the user 
+            # choose one to continue with
+            habit_set = st.session_state.get('habit_set')
+            if habit_set is not None:
+                show_habit_overview(habit_set)
+                select_habit(habit_set)
+                st.divider()
 
             # Check if the data is up to date
             today = dt.datetime.today().date()
-            latest_date = st.session_state.tracking_df['date'].iloc[-1].date()
+            latest_date = st.session_state.habit_series.last_date
             if latest_date < today:
-                # Update the session_state DataFrame
+                # Update the session_state data
                 next_date = latest_date + dt.timedelta(days=1)
-                st.session_state.tracking_df = (update_data(df, next_date))
+                update_data(st.session_state.habit_series, next_date)
 
             # Check again due to Streamlit's execution flow
-            latest_date = st.session_state.tracking_df['date'].iloc[-1].date()
+            latest_date = st.session_state.habit_series.last_date
             if latest_date >= today:
                 # Display a download option and data insights
-                up_to_date_download(st.session_state.tracking_df)
+                up_to_date_download(st.session_state.habit_series,
+                                    st.session_state.get('habit_set'))
                 st.divider()
-                show_all_data_info(st.session_state.tracking_df)
+                show_all_data_info(
+                    st.session_state.habit_series,
+                    st.session_state.get('update_data_aggregates'),
+                    st.session_state.get('update_data_milestones'),
+                    )
 
         except (ValueError, pd.errors.ParserError):
             st.error(gt('menu.upload_error', Lang.lang))
@@ -107,10 +191,10 @@ def data_preview() -> None:
     Display insights for the selected data set.
     """
     # Get all the CSV filenames in the 'test_data' subdirectory and 
-    # convert them to strings with spaces and no extension
+    # convert them to strings with spaces and no extension. The 
+    # directory is only listed again if it changes.
     data_dir = os.path.join(os.getcwd(), 'test_data')
-    csv_paths = glob(os.path.join(data_dir, '*.csv'))
-    existing_CSVs = [os.path.basename(csv) for csv in csv_paths]
+    existing_CSVs = test_datasets(data_dir)
     def filename_to_test_name(filename: str) -> str:
         return filename.removesuffix('.csv').replace('_', ' ')
     existing_test_names = [
@@ -135,9 +219,11 @@ def data_preview() -> None:
     st.divider()
 
     if selected_test_data != gt('menu.choose', Lang.lang):
-        # Read in the CSV file corresponding to the chosen name and 
-        # display data insights
+        # Get the data in the CSV file corresponding to the chosen name, 
+        # which is only read once per process, and display data insights
         filename = existing_CSVs[
             existing_test_names.index(selected_test_data)]
-        df = pd.read_csv('test_data/' + filename)
-        show_all_data_info(df)
+        with metrics.stage('load_test_data') as measured:
+            series = load_test_dataset(os.path.join(data_dir, filename))
+            measured['rows'] = len(series)
+        show_all_data_info(series)
@@ -0,0 +1,158 @@
+import os
+import time
+import tempfile
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+from config import Metrics
+
+
+# Upper bounds of the stage duration histogram buckets, in seconds
+buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+# Totals for each stage since the process started, shared by every
+# session: {stage: {'count', 'seconds', 'alloc_bytes', 'rows', 'buckets'}}
+_totals = {}
+_lock = threading.Lock()
+_last_export = 0.0
+_write_lock = threading.Lock()
+
+# Stages of the current rerun. Streamlit runs each session's script in
+# its own thread, so each rerun gets its own list.
+_run = threading.local()
+
+# Returned when metrics are disabled, so that timing a stage costs one
+# function call and nothing else
+_disabled = nullcontext({})
+
+def enabled() -> bool:
+    """Return whether a metrics file has been configured."""
+    return Metrics.path is not None
+
+def start_run() -> None:
+    """Start recording the stages of a new rerun."""
+    _run.stages = []
+    if (enabled() and Metrics.trace_allocations
+            and not tracemalloc.is_tracing()):
+        tracemalloc.start()
+
+def run_stages() -> list[dict]:
+    """Return the stages recorded so far in the current rerun."""
+    return getattr(_run, 'stages', [])
+
+def stage(name: str, rows: int = 0):
+    """Time a stage of a rerun as a context manager, recording its wall
+    time, the memory it allocated (if tracemalloc is tracing), and the
+    number of rows it processed. tracemalloc traces the whole process, 
+    so while several sessions are running the memory also includes what 
+    the others allocated at the same time; it's only exact with one 
+    session, as in the benchmarks. The rows can also be set once they're
+    known through the dict it returns, as in 
+        with stage('read_upload') as m:
+            ...
+            m['rows'] = len(df)
+    Stages shouldn't be nested. Does nothing if metrics are disabled.
+    """
+    if not enabled():
+        return _disabled
+    return _timed(name, rows)
+
+@contextmanager
+def _timed(name: str, rows: int) -> Iterator[dict]:
+    """Measure the stage run in the with block and record it."""
+    measured = {'rows': rows}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    try:
+        yield measured
+    finally:
+        seconds = time.perf_counter() - start
+        alloc_bytes = 0
+        if tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            alloc_bytes = max(peak - before, 0)
+        record(name, seconds, alloc_bytes, measured['rows'])
+
+def record(name: str, seconds: float, alloc_bytes: int, rows: int) -> None:
+    """Add one run of a stage to the totals, and export them if it's
+    been long enough since the last export.
+    """
+    global _last_export
+    run_stages().append({'stage': name, 'seconds': seconds,
+                         'alloc_bytes': alloc_bytes, 'rows': rows})
+    now = time.time()
+    with _lock:
+        totals = _totals.setdefault(name, {
+            'count': 0, 'seconds': 0.0, 'alloc_bytes': 0, 'rows': 0,
+            'buckets': [0] * len(buckets),
+            })
+        totals['count'] += 1
+        totals['seconds'] += seconds
+        totals['alloc_bytes'] += alloc_bytes
+        totals['rows'] += rows
+        for i, bound in enumerate(buckets):
+            if seconds <= bound:
+                totals['buckets'][i] += 1
+        due = now - _last_export >= Metrics.export_interval
+        if due:
+            _last_export = now
+            text = _exposition()
+    if due:
+        _write(text)
+
+def exposition() -> str:
+    """Return the totals in the Prometheus text exposition format."""
+    with _lock:
+        return _exposition()
+
+def _exposition() -> str:
+    """Format the totals in the Prometheus text exposition format. Call 
+    with the lock held.
+    """
+    lines = [
+        '# HELP ichiman_stage_seconds Wall time spent in each stage.',
+        '# TYPE ichiman_stage_seconds histogram',
+    ]
+    for name, totals in sorted(_totals.items()):
+        for bound, count in zip(buckets, totals['buckets']):
+            lines.append(f'ichiman_stage_seconds_bucket{{stage="{name}",'
+                         f'le="{bound}"}} {count}')
+        lines += [
+            f'ichiman_stage_seconds_bucket{{stage="{name}",le="+Inf"}} '
+            f"{totals['count']}",
+            f'ichiman_stage_seconds_sum{{stage="{name}"}} '
+            f"{totals['seconds']:.6f}",
+            f'ichiman_stage_seconds_count{{stage="{name}"}} '
+            f"{totals['count']}",
+        ]
+    for metric, key, help_text in (
+            ('ichiman_stage_alloc_bytes_total', 'alloc_bytes',
+             'Peak memory allocated by each stage, summed over runs.'),
+            ('ichiman_stage_rows_total', 'rows',
+             'Rows of data processed by each stage.')):
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        lines += [f'{metric}{{stage="{name}"}} {totals[key]}'
+                  for name, totals in sorted(_totals.items())]
+    return '\n'.join(lines) + '\n'
+
+def _write(text: str) -> None:
+    """Replace the metrics file with the latest totals, as a textfile 
+    collector such as node_exporter's expects: written to a temporary 
+    file in the same directory and then renamed over it, so that it's 
+    never read half written.
+    """
+    directory = os.path.dirname(os.path.abspath(Metrics.path))
+    with _write_lock:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, Metrics.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
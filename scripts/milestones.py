@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+
+class MilestoneIndex:
+    """Running total of a habit's time after each recorded day, kept in
+    arrays that grow by doubling so that recording a day takes constant
+    time. Since the totals only go up, when any number of hours was
+    first reached is a binary search, and the totals of the last n
+    recorded days are a difference of two of them.
+    Like engine.goal_projection, a number of hours is only reached once 
+    the total is more than it.
+    """
+    __slots__ = ('_days', '_totals', '_count')
+
+    def __init__(self, days=(), seconds=()) -> None:
+        self._days = np.zeros(0, dtype=np.int64)
+        self._totals = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self.append(days, seconds)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self._days.nbytes + self._totals.nbytes
+
+    @property
+    def days(self) -> np.ndarray:
+        """Recorded days as int days since the epoch."""
+        return self._days[:self._count]
+
+    @property
+    def totals(self) -> np.ndarray:
+        """Total seconds up to and including each recorded day."""
+        return self._totals[:self._count]
+
+    @property
+    def total(self) -> int:
+        """Total seconds of every recorded day."""
+        return int(self._totals[self._count - 1]) if self._count else 0
+
+    @property
+    def last_day(self) -> int | None:
+        return int(self._days[self._count - 1]) if self._count else None
+
+    def append(self, days, seconds) -> None:
+        """Record the durations of days after the last one."""
+        days = np.asarray(days, dtype=np.int64)
+        seconds = np.asarray(seconds, dtype=np.int64)
+        end = self._count + len(days)
+        if end > len(self._days):
+            capacity = max(end, 2 * len(self._days), 64)
+            self._days = np.resize(self._days, capacity)
+            self._totals = np.resize(self._totals, capacity)
+        self._days[self._count:end] = days
+        self._totals[self._count:end] = self.total + np.cumsum(seconds)
+        self._count = end
+
+    def crossings(self, hours) -> list[int | None]:
+        """Return the day each number of hours was first reached, or None
+        if it hasn't been yet, all in one vectorized search.
+        """
+        targets = np.asarray(hours, dtype=np.float64) * 3600
+        positions = np.searchsorted(self.totals, targets, side='right')
+        return [int(self._days[p]) if p < self._count else None
+                for p in positions.tolist()]
+
+    def crossed(self, hours: float) -> int | None:
+        """Return the day the number of hours was first reached."""
+        return self.crossings([hours])[0]
+
+    def rate(self, window: int | None = None) -> float | None:
+        """Average seconds per recorded day over the last `window`
+        recorded days, or over all of them if None. None if there aren't
+        enough days.
+        """
+        if window is None:
+            return self.total / self._count if self._count >= 2 else None
+        if self._count < window:
+            return None
+        before = (int(self._totals[self._count - window - 1])
+                  if self._count > window else 0)
+        return (self.total - before) / window
+
+    def forecast(self, hours: float, rate: float | None) -> int | None:
+        """Return the day the number of hours will be reached if the
+        given seconds per day are kept up from the day after the last
+        one, or the day it was reached if it already was. None if it
+        never will be at that rate.
+        """
+        remaining = hours * 3600 - self.total
+        if remaining < 0:
+            return self.crossed(hours)
+        if not rate or rate <= 0:
+            return None
+        # Reaching it takes at least one more day, even with no time left
+        return self.last_day + max(math.ceil(remaining / rate), 1)
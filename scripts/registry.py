@@ -0,0 +1,49 @@
+import os
+import threading
+from glob import glob
+
+import pandas as pd
+
+from scripts.cache import pin, unpin
+from scripts.series import HabitSeries
+
+
+# The test data sets never change while the site is running, so they are
+# only read once per process. Every session shares them, and everything
+# computed from them (aggregates, graphs, tables) is pinned in the cache
+# so that preview mode is always served from memory. A file is read
+# again if its modification time changes.
+_listings = {}  # directory -> (mtime, filenames)
+_datasets = {}  # path -> (mtime, HabitSeries)
+_lock = threading.Lock()
+
+def test_datasets(data_dir: str) -> list[str]:
+    """Return the filenames of the CSV files in the directory, only
+    listing it again when the directory's modification time changes.
+    """
+    mtime = os.stat(data_dir).st_mtime_ns
+    with _lock:
+        listing = _listings.get(data_dir)
+        if listing is None or listing[0] != mtime:
+            filenames = [os.path.basename(csv)
+                         for csv in glob(os.path.join(data_dir, '*.csv'))]
+            listing = _listings[data_dir] = (mtime, filenames)
+    return listing[1]
+
+def load_test_dataset(path: str) -> HabitSeries:
+    """Return the data in a test data CSV file, only reading it again
+    when the file's modification time changes.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        dataset = _datasets.get(path)
+        if dataset is not None and dataset[0] == mtime:
+            return dataset[1]
+
+    series = HabitSeries.from_frame(pd.read_csv(path))
+    with _lock:
+        if dataset is not None:
+            unpin(dataset[1].hash)
+        _datasets[path] = (mtime, series)
+    pin(series.hash)
+    return series
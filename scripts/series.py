@@ -0,0 +1,181 @@
+import hashlib
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+import scripts.codec as codec
+
+
+class HabitSeries:
+    """The recorded days of one habit as two read-only int32 arrays:
+    days since the epoch (sorted) and durations in seconds.
+    A session stores a single HabitSeries. Since it can't be changed,
+    everything that displays it works on views of the same arrays
+    instead of its own copy, and recording days creates a new series.
+    """
+    __slots__ = ('days', 'seconds', '_hash')
+
+    def __init__(self, days=(), seconds=()) -> None:
+        days = np.array(days, dtype=np.int32)
+        seconds = np.array(seconds, dtype=np.int32)
+        if days.shape != seconds.shape or days.ndim != 1:
+            raise ValueError('Days and durations must be 1D and the same '
+                             'length')
+        days.flags.writeable = False
+        seconds.flags.writeable = False
+        object.__setattr__(self, 'days', days)
+        object.__setattr__(self, 'seconds', seconds)
+        object.__setattr__(self, '_hash', None)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'HabitSeries':
+        """Build a series from a DataFrame of dates and durations in any
+        form codec.encode_frame accepts, assumed to be sorted by date.
+        """
+        compact_df = codec.encode_frame(df)
+        return cls(compact_df['date'], compact_df['duration'])
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __repr__(self) -> str:
+        if len(self) == 0:
+            return f'{type(self).__name__}(empty)'
+        return (f'{type(self).__name__}({len(self)} days, '
+                f'{self.first_date} to {self.last_date})')
+
+    @property
+    def first_date(self) -> dt.date:
+        return codec.day_to_date(self.days[0])
+
+    @property
+    def last_date(self) -> dt.date:
+        return codec.day_to_date(self.days[-1])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays in bytes."""
+        return self.days.nbytes + self.seconds.nbytes
+
+    @property
+    def hash(self) -> str:
+        """Hash of the contents, used as a cache key that is the same
+        for identical data in every session. Only computed once.
+        """
+        if self._hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(self.days)
+            digest.update(self.seconds)
+            object.__setattr__(self, '_hash', digest.hexdigest())
+        return self._hash
+
+    def frame(self) -> pd.DataFrame:
+        """Return a compact DataFrame viewing the arrays without copying
+        them. Its columns are read-only.
+        """
+        return pd.DataFrame({'date': self.days, 'duration': self.seconds},
+                            copy=False)
+
+    def append(self, days, seconds) -> 'HabitSeries':
+        """Return a new series with days recorded after the last one
+        added to the end.
+        """
+        return HabitSeries(np.concatenate([self.days, np.asarray(days)]),
+                           np.concatenate([self.seconds, np.asarray(seconds)]))
+
+class HabitSet:
+    """Several habits kept in one file, as an ordered mapping of habit 
+    names to their HabitSeries. Like a series, a set can't be changed: 
+    recording days for one habit creates a new set sharing the other 
+    habits' series.
+    """
+    __slots__ = ('_series', '_hash')
+
+    def __init__(self, series: dict[str, HabitSeries]) -> None:
+        object.__setattr__(self, '_series', dict(series))
+        object.__setattr__(self, '_hash', None)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'HabitSet':
+        """Split a compact DataFrame of several habits (see 
+        codec.make_habit_frame), sorted by habit and then date, into 
+        one series per habit. Habits without any days are left out.
+        """
+        if len(df) == 0:
+            return cls({})
+        codes = df['habit'].cat.codes.to_numpy()
+        names = df['habit'].cat.categories
+        days = df['date'].to_numpy()
+        seconds = df['duration'].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+        return cls({str(names[codes[start]]): HabitSeries(days[start:end],
+                                                          seconds[start:end])
+                    for start, end in zip(bounds[:-1], bounds[1:])})
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __iter__(self):
+        return iter(self._series)
+
+    def __getitem__(self, name: str) -> HabitSeries:
+        return self._series[name]
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({", ".join(self._series)})'
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._series)
+
+    def items(self):
+        return self._series.items()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays of every habit in bytes."""
+        return sum(series.nbytes for series in self._series.values())
+
+    @property
+    def hash(self) -> str:
+        """Hash of the names and contents of every habit, built from the 
+        hashes of their series. Only computed once.
+        """
+        if self._hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for name, series in self._series.items():
+                digest.update(name.encode())
+                digest.update(series.hash.encode())
+            object.__setattr__(self, '_hash', digest.hexdigest())
+        return self._hash
+
+    def replace(self, name: str, series: HabitSeries) -> 'HabitSet':
+        """Return a new set with the series of one habit replaced."""
+        return HabitSet({**self._series, name: series})
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the days and durations of every habit concatenated in 
+        order, along with the offsets of each habit within them, for 
+        the grouped reductions in scripts.grouped.
+        """
+        series = list(self._series.values())
+        offsets = np.r_[0, np.cumsum([len(s) for s in series])]
+        return (np.concatenate([s.days for s in series]),
+                np.concatenate([s.seconds for s in series]),
+                offsets)
+
+    def frame(self) -> pd.DataFrame:
+        """Return every habit as one compact DataFrame with a 'habit' 
+        column, sorted by habit and then date.
+        """
+        days, seconds, offsets = self.arrays()
+        codes = np.repeat(np.arange(len(self)), np.diff(offsets))
+        return codec.make_habit_frame(self.names, codes, days, seconds)
+
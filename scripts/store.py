@@ -0,0 +1,187 @@
+import queue
+import secrets
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+from config import Store
+from scripts.aggregates import RunningAggregates
+from scripts.series import HabitSeries
+
+
+# Dates are stored as int days since the epoch and durations as int
+# seconds, the same as in a HabitSeries. Durations are clustered by
+# (habit_id, date) so that reading or aggregating one habit only reads
+# that habit's rows, in date order.
+# Every visitor shares the store, so each habit belongs to the random 
+# key of the visitor who saved it, and habits are only ever looked up 
+# by name together with that key.
+_schema = '''
+CREATE TABLE IF NOT EXISTS habits (
+    habit_id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    goal INTEGER NOT NULL DEFAULT 10000,
+    UNIQUE (owner, name)
+);
+CREATE TABLE IF NOT EXISTS durations (
+    habit_id INTEGER NOT NULL REFERENCES habits (habit_id),
+    date INTEGER NOT NULL,
+    seconds INTEGER NOT NULL,
+    PRIMARY KEY (habit_id, date)
+) WITHOUT ROWID;
+'''
+
+# Idle connections shared by every session in the process
+_pool = queue.LifoQueue(maxsize=Store.pool_size)
+
+def enabled() -> bool:
+    """Return whether a database file has been configured."""
+    return Store.path is not None
+
+def _connect() -> sqlite3.Connection:
+    """Open a new connection in WAL mode so that sessions can read while
+    another one writes, creating the tables if needed.
+    """
+    conn = sqlite3.connect(Store.path, check_same_thread=False,
+                           isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    conn.executescript(_schema)
+    return conn
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a connection from the pool, opening one if none are idle,
+    and return it afterward. Connections beyond the pool size are closed.
+    """
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    finally:
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def new_owner() -> str:
+    """Return a new random key for a visitor to store habits under."""
+    return secrets.token_urlsafe(16)
+
+def habit_names(owner: str) -> list[str]:
+    """Return the names of all the habits stored under this key."""
+    with connection() as conn:
+        rows = conn.execute(
+            'SELECT name FROM habits WHERE owner = ? ORDER BY name',
+            (owner,))
+        return [name for name, in rows]
+
+def habit(owner: str, name: str) -> tuple[int, int] | None:
+    """Return the id and goal of the habit with this name stored under 
+    this key, or None if there isn't one.
+    """
+    with connection() as conn:
+        return conn.execute(
+            'SELECT habit_id, goal FROM habits WHERE owner = ? AND name = ?',
+            (owner, name)).fetchone()
+
+def save_habit(
+        owner: str,
+        name: str,
+        goal: int,
+        habit_id: int | None = None,
+        ) -> tuple[int, str]:
+    """Store a habit under this key, or update the goal of the habit 
+    with habit_id (the one the session already saved or loaded) if it 
+    still has this name and key. A new habit whose name is taken is 
+    stored as 'name (2)', 'name (3)', and so on rather than merged into 
+    the other one.
+    Return the habit's id and the name it's stored under.
+    """
+    with connection() as conn:
+        with conn:
+            # Take the write lock up front so that two sessions can't 
+            # both find the same name free
+            conn.execute('BEGIN IMMEDIATE')
+            if habit_id is not None and conn.execute(
+                    'UPDATE habits SET goal = ? '
+                    'WHERE habit_id = ? AND owner = ? AND name = ? '
+                    'RETURNING habit_id',
+                    (int(goal), habit_id, owner, name),
+                    ).fetchone() is not None:
+                return habit_id, name
+            taken = {taken_name for taken_name, in conn.execute(
+                'SELECT name FROM habits '
+                'WHERE owner = ? AND (name = ? OR name LIKE ?)',
+                (owner, name, f'{name} (%)'))}
+            stored_name = name
+            number = 2
+            while stored_name in taken:
+                stored_name = f'{name} ({number})'
+                number += 1
+            habit_id = conn.execute(
+                'INSERT INTO habits (owner, name, goal) VALUES (?, ?, ?) '
+                'RETURNING habit_id',
+                (owner, stored_name, int(goal)),
+                ).fetchone()[0]
+    return habit_id, stored_name
+
+def upsert_days(habit_id: int, days, seconds) -> None:
+    """Record the durations of the given days, replacing any durations
+    already recorded for them, in one transaction.
+    """
+    rows = zip(np.asarray(days).tolist(), np.asarray(seconds).tolist())
+    with connection() as conn:
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT INTO durations (habit_id, date, seconds) '
+                'VALUES (?, ?, ?) '
+                'ON CONFLICT (habit_id, date) '
+                'DO UPDATE SET seconds = excluded.seconds',
+                ((habit_id, day, s) for day, s in rows),
+                )
+
+def load_series(habit_id: int) -> HabitSeries:
+    """Read all of the recorded days of a habit as a HabitSeries."""
+    with connection() as conn:
+        rows = conn.execute(
+            'SELECT date, seconds FROM durations WHERE habit_id = ? '
+            'ORDER BY date',
+            (habit_id,),
+            ).fetchall()
+    table = np.array(rows, dtype=np.int32).reshape(-1, 2)
+    return HabitSeries(table[:, 0], table[:, 1])
+
+def totals(habit_id: int) -> tuple[int, int]:
+    """Return the number of recorded days and total seconds of a habit,
+    computed by the database.
+    """
+    with connection() as conn:
+        count, total = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(seconds), 0) '
+            'FROM durations WHERE habit_id = ?',
+            (habit_id,),
+            ).fetchone()
+    return count, total
+
+def aggregates(habit_id: int) -> RunningAggregates:
+    """Build the running totals of a habit from the database's count and
+    sum and only the most recent days, without reading its history.
+    """
+    count, total = totals(habit_id)
+    longest = max(RunningAggregates.windows)
+    with connection() as conn:
+        recent = conn.execute(
+            'SELECT seconds FROM durations WHERE habit_id = ? '
+            'ORDER BY date DESC LIMIT ?',
+            (habit_id, longest),
+            ).fetchall()
+    return RunningAggregates.from_totals(
+        count, total, [s for s, in reversed(recent)])
@@ -0,0 +1,48 @@
+import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from matplotlib.ticker import ScalarFormatter
+
+from config import Chart
+
+
+def _load_fonts() -> dict[str, str]:
+    """Register the fonts each language needs with matplotlib and
+    return the font family to use for that language's figures.
+    """
+    fonts = {}
+    if Chart.ja_font.exists():
+        # Set up the font to properly display Japanese
+        fm.fontManager.addfont(str(Chart.ja_font))
+        fonts['ja'] = fm.FontProperties(fname=Chart.ja_font).get_name()
+    return fonts
+
+# Fonts are only loaded once per process, when this module is imported
+fonts = _load_fonts()
+
+class AsciiMinusFormatter(ScalarFormatter):
+    """ScalarFormatter that always uses the ASCII minus, whatever
+    axes.unicode_minus is set to in the rcParams.
+    """
+    @staticmethod
+    def fix_minus(s: str) -> str:
+        return s
+
+def apply_style(fig: Figure, lang: str = 'en-US') -> None:
+    """Apply the language's fonts to a built figure before it's
+    rendered. rcParams are shared by every session in the process, so
+    they're never changed; only this figure's own settings are.
+    """
+    family = fonts.get(lang)
+    if family is None:
+        return
+    for text in fig.findobj(Text):
+        text.set_fontfamily(family)
+    for ax in fig.axes:
+        # Tick labels are also created while the figure is drawn
+        ax.tick_params(which='both', labelfontfamily=family)
+
+        # Use ASCII minus
+        for axis in (ax.xaxis, ax.yaxis):
+            if type(axis.get_major_formatter()) is ScalarFormatter:
+                axis.set_major_formatter(AsciiMinusFormatter())